@@ -1,6 +1,46 @@
-from .linear_form import LinearForm
-from .base_linear_form import BaseLinearForm
-from .pascal_form import PascalForm
-from .hyperfield_linear_form import HyperfieldLinearForm
-from .hyperfield_vector import HyperfieldVector
-from .hyperfield_linear_system import HyperfieldHomogeneousLinearSystem
+"""
+The chipsplitting library. Classes and functions are imported lazily on first access,
+so importing the package does not load the compiled solver extension.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "LinearForm": ".linear_form",
+    "BaseLinearForm": ".base_linear_form",
+    "PascalForm": ".pascal_form",
+    "HyperfieldLinearForm": ".hyperfield_linear_form",
+    "HyperfieldVector": ".hyperfield_vector",
+    "HyperfieldHomogeneousLinearSystem": ".hyperfield_linear_system",
+    "SolverBackend": ".solver_backends",
+    "available_backends": ".solver_backends",
+    "get_backend": ".solver_backends",
+    "register_backend": ".solver_backends",
+    "set_default_backend": ".solver_backends",
+    "SearchCount": ".solver_backends",
+    "SearchEstimate": ".estimate",
+    "estimate_search": ".estimate",
+    "pascal_system": ".supports",
+    "find_positive_supports": ".supports",
+    "find_positive_supports_range": ".supports",
+    "find_minimal_supports": ".supports",
+    "SparsePascalSystem": ".sparse_pascal",
+    "pascal_matrix": ".sparse_pascal",
+    "ZDD": ".zdd",
+    "ZDDManager": ".zdd",
+    "find_fundamental_models_parallel": ".fundamental",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
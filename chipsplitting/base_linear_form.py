@@ -12,6 +12,8 @@ class BaseLinearForm(abc.ABC):
     A linear form is a polynomial of degree one without any constant.
     """
 
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def support_neg(self) -> NDArray:
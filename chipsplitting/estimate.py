@@ -0,0 +1,156 @@
+"""
+Module for estimating the size of the support search before running it.
+
+The search of quick_solve_loop_fast is a tree whose nodes are pairs of a partial
+support and the index of the next constraint. Knuth's estimator follows random paths
+from the root. A path that picks one of k children multiplies its weight by k, and
+the weight at a node is an unbiased estimate of the number of nodes at its depth.
+Averaging the weights of many paths estimates the size of the tree, the number of
+leaves and the size of the frontier after every constraint, i.e. the size of the
+breadth-first queue of the native search.
+
+Several leaves can hold the same support, and the search returns one support of
+every pair of reflected supports. A path ending in a support S that m(S) leaves hold
+is weighted by 1 / m(S), halved if the reflection of S is a different support that is
+a leaf as well. Both multiplicities are counted exactly by a search that only adds
+cells of S, so the average estimates the number of returned supports.
+"""
+
+import random
+from statistics import NormalDist
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from . import tracing
+from .solver_backends import constraints_degree
+from .utils import reflect_indices
+
+
+class Estimate(NamedTuple):
+    """
+    A mean with the bounds of its normal confidence interval.
+    """
+
+    mean: float
+    low: float
+    high: float
+
+
+class SearchEstimate(NamedTuple):
+    """
+    The result of estimate_search.
+    """
+
+    probes: int
+    # The number of nodes of the search tree
+    nodes: Estimate
+    # The number of leaves, i.e. supports counted with multiplicity and with both
+    # supports of a reflected pair. This bounds the work of the search.
+    leaves: Estimate
+    # The number of supports the search returns
+    supports: Estimate
+    # The number of nodes after every constraint, the last entry are the leaves
+    frontier: list[Estimate]
+
+    @property
+    def peak_frontier(self) -> Estimate:
+        """
+        The estimated largest frontier, which bounds the memory of the native search.
+        """
+        return max(self.frontier, key=lambda estimate: estimate.mean)
+
+
+def _multiplicity(constraints: list[frozenset], support: frozenset) -> int:
+    """
+    Returns the number of leaves of the search tree that hold the support.
+    """
+
+    def count(level: int, conf: frozenset) -> int:
+        while level < len(constraints) and not conf.isdisjoint(constraints[level]):
+            level += 1
+        if level == len(constraints):
+            return int(conf == support)
+        return sum(
+            count(level + 1, conf | {cell}) for cell in constraints[level] & support
+        )
+
+    return count(0, frozenset())
+
+
+def _estimate(samples: np.ndarray, z: float) -> Estimate:
+    mean = float(np.mean(samples))
+    if len(samples) < 2:
+        return Estimate(mean, 0.0, np.inf)
+    error = z * float(np.std(samples, ddof=1)) / len(samples) ** 0.5
+    return Estimate(mean, max(mean - error, 0.0), mean + error)
+
+
+@tracing.traced(items=lambda estimate: estimate.probes)
+def estimate_search(
+    constraints: list[list[int]],
+    support_size: int,
+    probes: int = 1000,
+    seed: Optional[int] = None,
+    confidence: float = 0.95,
+) -> SearchEstimate:
+    """
+    Estimates the size of the search for all supports of size at most support_size
+    that intersect every constraint.
+
+    The constraints are ordered by a stable sort by size like in the solver backends,
+    so the estimated tree is the tree that they search.
+
+    :param constraints: A list of constraints, each given as a list of cell indices.
+    :param support_size: The maximal size of a support.
+    :param probes: The number of random paths.
+    :param seed: The seed of the random number generator.
+    :param confidence: The confidence level of the intervals.
+    """
+    assert probes > 0, "At least one probe is required."
+    rng = random.Random(seed)
+    degree = constraints_degree(constraints)
+    constraints = [sorted(set(c)) for c in sorted(constraints, key=len)]
+    constraint_sets = [frozenset(c) for c in constraints]
+    num_constraints = len(constraints)
+    multiplicities: dict[frozenset, int] = {}
+
+    def multiplicity(support: frozenset) -> int:
+        if support not in multiplicities:
+            multiplicities[support] = _multiplicity(constraint_sets, support)
+        return multiplicities[support]
+
+    # weights[p, k] is the weight of probe p after k constraints, 0 if it died
+    weights = np.zeros((probes, num_constraints + 1))
+    nodes = np.zeros(probes)
+    supports = np.zeros(probes)
+    for p in range(probes):
+        support = set()
+        weight = 1.0
+        nodes[p] = 1.0
+        for level, constr in enumerate(constraints):
+            if support.isdisjoint(constr):
+                if len(support) >= support_size or not constr:
+                    weight = 0.0
+                    break
+                weight *= len(constr)
+                support.add(rng.choice(constr))
+            weights[p, level + 1] = weight
+            nodes[p] += weight
+        weights[p, 0] = 1.0
+
+        if weight > 0:
+            support = frozenset(support)
+            cells = np.array(sorted(support), dtype=np.int64)
+            reflected = frozenset(int(c) for c in reflect_indices(cells, degree))
+            pairs = 1 if reflected == support or not multiplicity(reflected) else 2
+            supports[p] = weight / (multiplicity(support) * pairs)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return SearchEstimate(
+        probes,
+        _estimate(nodes, z),
+        _estimate(weights[:, -1], z),
+        _estimate(supports, z),
+        [_estimate(weights[:, k], z) for k in range(num_constraints + 1)],
+    )
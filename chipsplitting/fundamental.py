@@ -0,0 +1,243 @@
+"""
+Module for checking which support candidates are supports of fundamental models.
+
+A support S = {(nu_i, mu_i)} is the support of a fundamental model if the scalings c_i
+with sum_i c_i t^nu_i (1 - t)^mu_i = 1 are unique and positive, see [BM25_MATHREPO],
+Step 4. The candidates are checked by a pool of worker processes. They are stored in
+a shared memory array, so the workers receive only index ranges and send back the
+fundamental models as compact arrays.
+"""
+
+import math
+import multiprocessing
+from functools import lru_cache
+from itertools import combinations
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import tracing
+from .solver_backends import unique_rows
+from .utils import (
+    binomial_table,
+    coordinate_tables,
+    gauss,
+    reflect_supports,
+    sort_supports,
+    support_dtype,
+)
+
+
+@lru_cache(maxsize=None)
+def basis_matrix(degree: int) -> np.ndarray:
+    """
+    Returns the matrix whose column i contains the coefficients of the polynomial
+    t^col (1 - t)^row of the cell (col, row) with array index i.
+    Row k contains the coefficients of t^k. The matrix is read-only.
+    """
+    cols, rows, _, _ = coordinate_tables(degree)
+    powers = np.arange(degree + 1)[:, None] - cols[None, :]
+    valid = (powers >= 0) & (powers <= rows[None, :])
+    powers = np.where(valid, powers, 0)
+    binomials = binomial_table(degree + 1)[rows[None, :], powers]
+    matrix = np.where(valid, (-1) ** powers * binomials, 0).astype(float)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def is_fundamental(support, degree: int):
+    """
+    Solves for the scalings of the cells of the support.
+
+    :return: The scalings if they are unique, None otherwise.
+    """
+    support = list(support)
+    b = np.zeros(degree + 1)
+    b[0] = 1
+    sol, norm, rank, _ = np.linalg.lstsq(
+        basis_matrix(degree)[:, support], b, rcond=None
+    )
+
+    if rank < len(support):
+        return None
+    if len(norm) == 0:
+        return sol
+    if np.isclose(norm[0], 0):
+        assert norm[0] < 1e-20, f"Ill-conditioned residual {norm[0]}"
+        return sol
+    return None
+
+
+def is_positive(solution) -> bool:
+    """
+    Returns true if all entries of the solution are positive and not close to zero.
+    """
+    solution = np.asarray(solution)
+    return bool(np.all(solution > 0) and not np.any(np.isclose(solution, 0)))
+
+
+def process_single_support(support, n: int, degree: int) -> np.ndarray:
+    """
+    Computes the fundamental models of size n + 1 containing the support.
+    A smaller support is extended by every selection of further cells.
+
+    :return: The fundamental models and their reflections as a 2D array with one
+        sorted support per row.
+    """
+    support = tuple(int(x) for x in support)
+    if len(support) <= n:
+        # The negative cell 0 never belongs to the positive support
+        domain = [x for x in range(1, gauss(degree + 1)) if x not in support]
+        selections = (
+            tuple(sorted(support + c))
+            for c in combinations(domain, n + 1 - len(support))
+        )
+    elif len(support) == n + 1:
+        selections = [support]
+    else:
+        selections = []
+
+    fundamental = [
+        s
+        for s in selections
+        if (solution := is_fundamental(s, degree)) is not None
+        and is_positive(solution)
+    ]
+    fundamental = np.array(fundamental, dtype=np.int64).reshape(-1, n + 1)
+    return np.concatenate((fundamental, reflect_supports(fundamental, degree)))
+
+
+def extension_counts(supports: np.ndarray, n: int, degree: int) -> np.ndarray:
+    """
+    Returns the number of supports of size n + 1 that process_single_support checks
+    for every zero padded support.
+    """
+    sizes = np.count_nonzero(supports, axis=1)
+    num_cells = gauss(degree + 1) - 1
+    return np.array(
+        [math.comb(num_cells - size, n + 1 - size) for size in sizes], dtype=float
+    )
+
+
+def chunk_ranges(work: np.ndarray, num_workers: int, factor: int = 4) -> list[range]:
+    """
+    Splits the rows into consecutive ranges with guided scheduling. Every range takes
+    about 1 / (factor * num_workers) of the remaining work, so the ranges shrink
+    towards the end and the workers finish at about the same time.
+
+    :param work: The estimated work of every row.
+    :param num_workers: The number of worker processes.
+    :param factor: The number of ranges per worker that one range of work amounts to.
+    """
+    cumulative = np.cumsum(work)
+    total = cumulative[-1] if len(cumulative) else 0
+    min_work = total / (64 * factor * max(num_workers, 1))
+    ranges = []
+    start = 0
+    while start < len(work):
+        done = cumulative[start - 1] if start else 0
+        target = done + max((total - done) / (factor * max(num_workers, 1)), min_work)
+        stop = max(int(np.searchsorted(cumulative, target, side="right")), start + 1)
+        ranges.append(range(start, min(stop, len(work))))
+        start = stop
+    return ranges
+
+
+def as_candidate_array(supports, n: int) -> np.ndarray:
+    """
+    Converts the support candidates to a 2D array with one sorted support per row,
+    padded with zeros to n + 1 columns.
+    """
+    if isinstance(supports, np.ndarray):
+        rows = sort_supports(supports.astype(np.int64))
+        assert not rows[:, n + 1 :].any(), "A support is larger than n + 1"
+        candidates = np.zeros((len(rows), n + 1), dtype=np.int64)
+        candidates[:, : min(rows.shape[1], n + 1)] = rows[:, : n + 1]
+        return candidates
+
+    supports = [sorted(int(x) for x in support if x > 0) for support in supports]
+    candidates = np.zeros((len(supports), n + 1), dtype=np.int64)
+    for i, support in enumerate(supports):
+        assert len(support) <= n + 1, f"Support {support} is larger than n + 1"
+        candidates[i, : len(support)] = support
+    return candidates
+
+
+# State of a worker process, set by _init_worker
+_worker_state = {}
+
+
+def _init_worker(name: str, shape: tuple, dtype: str, n: int, degree: int):
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_state["shm"] = shm
+    _worker_state["candidates"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker_state["n"] = n
+    _worker_state["degree"] = degree
+
+
+def _process_range(rows: range) -> np.ndarray:
+    candidates = _worker_state["candidates"]
+    n, degree = _worker_state["n"], _worker_state["degree"]
+    results = [
+        process_single_support(row[row > 0], n, degree)
+        for row in candidates[rows.start : rows.stop]
+    ]
+    result = np.concatenate(results) if results else np.zeros((0, n + 1))
+    return unique_rows(result.astype(candidates.dtype).reshape(-1, n + 1))[0]
+
+
+@tracing.traced(items=len)
+def find_fundamental_models_parallel(
+    n: int, degree: int, supports, processes: int | None = None
+) -> np.ndarray:
+    """
+    Computes the fundamental models of size n + 1 and the given degree whose
+    supports contain one of the support candidates.
+
+    :param n: The number of cells of a fundamental model minus one.
+    :param degree: The degree d.
+    :param supports: The support candidates, either as an iterable of supports or as
+        a 2D array with one zero padded support per row.
+    :param processes: The number of worker processes. Defaults to the number of CPUs.
+        If 1, the candidates are checked in the calling process.
+    :return: The fundamental models and their reflections as a 2D array with one
+        sorted support per row, sorted lexicographically.
+    """
+    with tracing.span("fundamental.candidates") as s:
+        candidates = as_candidate_array(supports, n)
+        dtype = support_dtype(degree)
+        candidates = candidates.astype(dtype)
+        processes = processes or multiprocessing.cpu_count()
+        ranges = chunk_ranges(extension_counts(candidates, n, degree), processes)
+        s.count(len(candidates))
+
+    if processes == 1 or len(ranges) <= 1:
+        _worker_state.update(candidates=candidates, n=n, degree=degree)
+        try:
+            with tracing.span("fundamental.check", processes=1) as s:
+                results = [_process_range(rows) for rows in ranges]
+                s.count(len(ranges))
+        finally:
+            _worker_state.clear()
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(candidates.nbytes, 1))
+        try:
+            np.ndarray(candidates.shape, dtype=dtype, buffer=shm.buf)[:] = candidates
+            with tracing.span("fundamental.check", processes=processes) as s:
+                with multiprocessing.Pool(
+                    processes,
+                    initializer=_init_worker,
+                    initargs=(shm.name, candidates.shape, dtype.str, n, degree),
+                ) as pool:
+                    results = list(pool.imap_unordered(_process_range, ranges))
+                s.count(len(ranges))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    with tracing.span("fundamental.merge") as s:
+        if not results:
+            return np.zeros((0, n + 1), dtype=dtype)
+        models = unique_rows(np.concatenate(results))[0]
+        s.count(len(models))
+    return models
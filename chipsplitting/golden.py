@@ -0,0 +1,428 @@
+"""
+Module for rerunning the pipeline against the reference outputs in data/ and
+fundamental-models/.
+
+For every pair (n, d) the stages forms, constraints, solver, minimal filter and
+fundamental check are run and timed, while a background thread samples the memory
+of the process. Supports are compared up to reflection. Random filtered and limited
+queries of the backend are compared with filtering the result of the solver. The
+fundamental check is repeated with a pool of two processes and with no candidates.
+
+The reference candidates in data/ contain non-minimal supports whose selection
+depends on how the solver orders constraints of equal size. Most of them match the
+stable order of the backends exactly, but not all (e.g. n05_d09), so only their
+minimal supports are compared.
+
+Usage: python -m chipsplitting.golden --pairs 4:6 5:7 --backend numpy
+"""
+
+import argparse
+import json
+import os
+import pickle
+import random
+import re
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from . import tracing
+from .fundamental import as_candidate_array, find_fundamental_models_parallel
+from .solver_backends import (
+    constraints_degree,
+    get_backend,
+    unique_rows,
+)
+from .supports import find_minimal_supports, pascal_system
+from .utils import canonicalize_supports, gauss, reflect_supports
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent
+GOLDEN_FILE_PATTERN = re.compile(r"n(\d+)_d(\d+)(_minimal)?\.pkl")
+
+
+class StageResult(NamedTuple):
+    name: str
+    seconds: float
+    peak_rss: int
+    count: int
+
+
+class GoldenResult(NamedTuple):
+    n: int
+    degree: int
+    stages: list[StageResult]
+    minimal_match: Optional[bool]
+    fundamental_match: Optional[bool]
+    query_match: Optional[bool]
+    parallel_match: Optional[bool]
+    memory_samples: list[tuple[float, int]]
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.minimal_match is not False
+            and self.fundamental_match is not False
+            and self.query_match is not False
+            and self.parallel_match is not False
+        )
+
+
+def current_rss() -> int:
+    """
+    Returns the resident set size of the process in bytes, or the peak resident set
+    size if the current one is not available on this platform.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemorySampler:
+    """
+    Context manager sampling the resident set size of the process in a background
+    thread. Memory of worker processes is not included.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        :param interval: The time between two samples in seconds.
+        """
+        self.interval = interval
+        self.samples: list[tuple[float, int]] = []
+        self._start = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        self.samples.append((time.perf_counter() - self._start, current_rss()))
+
+    def peak_since(self, seconds: float) -> int:
+        """
+        Returns the largest sample taken after the given time since the start.
+        """
+        self.sample()
+        return max(rss for t, rss in self.samples if t >= seconds)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def golden_pairs(root: Path = DEFAULT_ROOT) -> list[tuple[int, int]]:
+    """
+    Returns all pairs (n, d) with a reference file in data/ or fundamental-models/.
+    """
+    pairs = set()
+    for directory in ("data", "fundamental-models"):
+        for path in (root / directory).glob("*.pkl"):
+            match = GOLDEN_FILE_PATTERN.fullmatch(path.name)
+            if match:
+                pairs.add((int(match.group(1)), int(match.group(2))))
+    return sorted(pairs)
+
+
+@tracing.traced("pickle.load", items=len)
+def load_golden(path: Path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def canonical_set(supports: np.ndarray, degree: int) -> set[tuple[int, ...]]:
+    """
+    Converts zero padded supports to a set of tuples, keeping one support of every
+    pair of reflected supports.
+    """
+    rows = unique_rows(canonicalize_supports(supports, degree))[0]
+    return {tuple(int(x) for x in row[row > 0]) for row in rows}
+
+
+def check_queries(
+    constraints: list[list[int]],
+    support_size: int,
+    supports: np.ndarray,
+    backend: Optional[str] = None,
+    trials: int = 20,
+    seed: int = 0,
+) -> int:
+    """
+    Runs queries with required and forbidden cells, an exact size and a limit through
+    SolverBackend.query and compares them with filtering the supports of the full
+    search in plain Python. The first queries use the negative cell 0 and cells
+    outside of the triangle, the others are random. Returns the number of queries
+    that do not match.
+
+    :param constraints: The constraints of the search.
+    :param support_size: The maximal size of a support.
+    :param supports: The result of quick_solve for the constraints as an array.
+    :param backend: The name of the solver backend.
+    :param trials: The number of random queries.
+    :param seed: The seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    solver = get_backend(backend)
+    degree = constraints_degree(constraints)
+    num_cells = gauss(degree + 1)
+    pairs = [
+        (tuple(int(x) for x in row[row > 0]), tuple(int(x) for x in mirror[mirror > 0]))
+        for row, mirror in zip(supports, reflect_supports(supports, degree))
+    ]
+    cells = sorted({int(c) for constraint in constraints for c in constraint})
+    queries = [
+        ([0], [], None),
+        ([], [0, -1, num_cells], None),
+        ([num_cells], [], None),
+    ]
+    for _ in range(trials):
+        queries.append(
+            (
+                rng.sample(cells, min(rng.randint(0, 2), len(cells))),
+                rng.sample(cells, min(rng.randint(0, 4), len(cells))),
+                rng.choice([None, *range(1, support_size + 1)]),
+            )
+        )
+
+    mismatches = 0
+    for required, forbidden, exact_size in queries:
+
+        def matches(support: tuple) -> bool:
+            return (
+                set(required) <= set(support)
+                and set(forbidden).isdisjoint(support)
+                and (exact_size is None or len(support) == exact_size)
+            )
+
+        expected = sorted(
+            {
+                min(s for s in pair if matches(s))
+                for pair in pairs
+                if matches(pair[0]) or matches(pair[1])
+            }
+        )
+        query = (constraints, support_size, required, forbidden, exact_size)
+        result = solver.query(*query)
+        limited = solver.query(*query, limit=3)
+        mismatches += not (
+            sorted(result) == expected
+            and len(limited) == min(3, len(expected))
+            and set(limited) <= set(expected)
+        )
+    return mismatches
+
+
+def check_parallel(
+    n: int, degree: int, candidates: np.ndarray, models: np.ndarray
+) -> bool:
+    """
+    Reruns the fundamental model check with two worker processes and with no
+    candidates, so the pool and the empty result are exercised on every machine.
+    Returns true if the pool finds the given models and the empty input none.
+    """
+    pooled = find_fundamental_models_parallel(n, degree, candidates, processes=2)
+    empty = find_fundamental_models_parallel(n, degree, [], processes=2)
+    return np.array_equal(pooled, models) and empty.shape == (0, n + 1)
+
+
+def run_pair(
+    n: int,
+    degree: int,
+    root: Path = DEFAULT_ROOT,
+    backend: Optional[str] = None,
+    processes: Optional[int] = None,
+    fundamental: bool = True,
+    interval: float = 0.01,
+    queries: int = 20,
+) -> GoldenResult:
+    """
+    Runs the pipeline for one pair (n, d) and compares it with the reference files.
+
+    :param n: The size of the supports minus one.
+    :param degree: The degree d.
+    :param root: The directory containing data/ and fundamental-models/.
+    :param backend: The name of the solver backend.
+    :param processes: The number of worker processes of the fundamental check.
+    :param fundamental: If False, the fundamental check is skipped.
+    :param interval: The time between two memory samples in seconds.
+    :param queries: The number of random queries, see check_queries.
+    """
+    stages = []
+
+    with MemorySampler(interval) as sampler:
+
+        def stage(name, function, count=len):
+            start = sampler.elapsed()
+            result = function()
+            seconds = sampler.elapsed() - start
+            stages.append(
+                StageResult(name, seconds, sampler.peak_since(start), count(result))
+            )
+            return result
+
+        system = stage(
+            "forms", lambda: pascal_system(degree), lambda s: len(s.linear_forms)
+        )
+        constraints = stage("constraints", system.make_constraints)
+        supports = stage(
+            "solver",
+            lambda: get_backend(backend).quick_solve(constraints, n + 1, as_array=True),
+        )
+        query_match = None
+        if queries > 0:
+            mismatches = stage(
+                "queries",
+                lambda: check_queries(constraints, n + 1, supports, backend, queries),
+                lambda _: queries,
+            )
+            query_match = mismatches == 0
+        minimal = stage("minimal", lambda: find_minimal_supports(supports, degree))
+        models = None
+        parallel_match = None
+        if fundamental:
+            models = stage(
+                "fundamental",
+                lambda: find_fundamental_models_parallel(n, degree, minimal, processes),
+            )
+            parallel_match = stage(
+                "parallel",
+                lambda: check_parallel(n, degree, minimal, models),
+                lambda _: 2,
+            )
+
+    minimal_match = None
+    for name in (f"n{n:02}_d{degree:02}_minimal.pkl", f"n{n:02}_d{degree:02}.pkl"):
+        path = root / "data" / name
+        if path.exists():
+            expected = as_candidate_array(load_golden(path), n)
+            minimal_match = canonical_set(minimal, degree) == canonical_set(
+                find_minimal_supports(expected, degree), degree
+            )
+            break
+
+    fundamental_match = None
+    path = root / "fundamental-models" / f"n{n:02}_d{degree:02}.pkl"
+    if models is not None and path.exists():
+        expected = as_candidate_array(load_golden(path), n)
+        fundamental_match = canonical_set(models, degree) == canonical_set(
+            expected, degree
+        )
+
+    return GoldenResult(
+        n,
+        degree,
+        stages,
+        minimal_match,
+        fundamental_match,
+        query_match,
+        parallel_match,
+        sampler.samples,
+    )
+
+
+def format_result(result: GoldenResult) -> str:
+    def match(value):
+        return {None: "-", True: "ok", False: "MISMATCH"}[value]
+
+    stages = "  ".join(
+        f"{s.name} {s.seconds:.3f}s {s.peak_rss / 2**20:.0f}MiB ({s.count})"
+        for s in result.stages
+    )
+    return (
+        f"n={result.n:<2} d={result.degree:<2} | minimal: {match(result.minimal_match)}"
+        f" | fundamental: {match(result.fundamental_match)}"
+        f" | queries: {match(result.query_match)}"
+        f" | parallel: {match(result.parallel_match)} | {stages}"
+    )
+
+
+def parse_pair(value: str) -> tuple[int, int]:
+    n, degree = value.split(":")
+    return int(n), int(degree)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m chipsplitting.golden",
+        description="Reruns the pipeline and compares it with the reference files.",
+    )
+    parser.add_argument(
+        "--pairs",
+        nargs="+",
+        type=parse_pair,
+        help="Pairs n:d to run. Defaults to all reference pairs with n <= --max-n.",
+    )
+    parser.add_argument("--max-n", type=int, default=5)
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT)
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--skip-fundamental", action="store_true")
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument(
+        "--queries", type=int, default=20, help="The number of random queries."
+    )
+    parser.add_argument("--json", type=Path, help="Writes all results to this file.")
+    args = parser.parse_args(argv)
+
+    pairs = args.pairs or [p for p in golden_pairs(args.root) if p[0] <= args.max_n]
+    results = []
+    for n, degree in pairs:
+        result = run_pair(
+            n,
+            degree,
+            args.root,
+            args.backend,
+            args.processes,
+            not args.skip_fundamental,
+            args.interval,
+            args.queries,
+        )
+        print(format_result(result), flush=True)
+        results.append(result)
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(
+                [
+                    {
+                        "n": r.n,
+                        "degree": r.degree,
+                        "stages": [s._asdict() for s in r.stages],
+                        "minimal_match": r.minimal_match,
+                        "fundamental_match": r.fundamental_match,
+                        "query_match": r.query_match,
+                        "parallel_match": r.parallel_match,
+                        "memory_samples": r.memory_samples,
+                    }
+                    for r in results
+                ],
+                f,
+                indent=2,
+            )
+
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,8 @@ class HyperfieldLinearForm(BaseLinearForm):
     Linear form for hyperfield
     """
 
+    __slots__ = ("_support_pos", "_support_neg")
+
     def __init__(self, support_pos: NDArray[np.bool_], support_neg: NDArray[np.bool_]):
         """
         A linear form in a hyperfield is just a sum of x_ij whose coefficients are either 1 or -1.
@@ -22,8 +24,41 @@ class HyperfieldLinearForm(BaseLinearForm):
         :param support_neg: A list of boolean values that represent the negative support.
         """
 
-        self._support_pos = np.array(support_pos)
-        self._support_neg = np.array(support_neg)
+        self._support_pos = np.array(support_pos, dtype=np.bool_)
+        self._support_neg = np.array(support_neg, dtype=np.bool_)
+
+    @classmethod
+    def from_array(
+        cls,
+        support_pos: NDArray[np.bool_],
+        support_neg: NDArray[np.bool_],
+        validate: bool = False,
+    ):
+        """
+        Creates a hyperfield linear form without copying boolean input arrays.
+        The arrays are shared with the caller and must not be modified afterwards.
+
+        :param support_pos: A boolean array that represents the positive support.
+        :param support_neg: A boolean array that represents the negative support.
+        :param validate: If True, checks that both supports are flat arrays of
+            the same size that do not intersect.
+        """
+        support_pos = np.asarray(support_pos, dtype=np.bool_)
+        support_neg = np.asarray(support_neg, dtype=np.bool_)
+
+        if validate:
+            assert support_pos.ndim == 1, "Supports must be flat arrays."
+            assert (
+                support_pos.shape == support_neg.shape
+            ), "Positive and negative support must have the same size."
+            assert not np.any(
+                support_pos & support_neg
+            ), "Positive and negative support must be disjoint."
+
+        form = cls.__new__(cls)
+        form._support_pos = support_pos
+        form._support_neg = support_neg
+        return form
 
     @property
     def support_neg(self):
@@ -95,7 +130,7 @@ class HyperfieldLinearForm(BaseLinearForm):
         return 0
 
     def __neg__(self):
-        return HyperfieldLinearForm(self.support_neg, self.support_pos)
+        return HyperfieldLinearForm.from_array(self.support_neg, self.support_pos)
 
     def __eq__(self, other):
         return np.all(self.support_pos == other.support_pos) and np.all(
@@ -225,4 +260,4 @@ class HyperfieldLinearForm(BaseLinearForm):
             elif self.support_neg[i]:
                 support_neg[index_to_update] = True
 
-        return HyperfieldLinearForm(support_pos, support_neg)
+        return HyperfieldLinearForm.from_array(support_pos, support_neg)
@@ -7,9 +7,10 @@ from collections import deque
 
 import numpy as np
 
+from . import tracing
 from .hyperfield_linear_form import HyperfieldLinearForm
 from .hyperfield_vector import HyperfieldVector
-from . import solver_ext
+from .solver_backends import get_backend
 
 class HyperfieldHomogeneousLinearSystem:
     """
@@ -17,8 +18,10 @@ class HyperfieldHomogeneousLinearSystem:
     It contains a list of linear forms that we want to roots for.
     """
 
+    @tracing.traced("HyperfieldHomogeneousLinearSystem")
     def __init__(self, linear_forms: list[HyperfieldLinearForm]):
         self.linear_forms = linear_forms
+        tracing.current_span().count(len(linear_forms))
 
         conditions = []
         for form in linear_forms:
@@ -48,6 +51,7 @@ class HyperfieldHomogeneousLinearSystem:
         support_without_neg[0] = False
         return bool(np.all(self.conditions.dot(support_without_neg)))
 
+    @tracing.traced(items=len)
     def make_constraints(self) -> list[set[int]]:
         """
         Given the list of linear forms, compute a list constraints.
@@ -55,48 +59,209 @@ class HyperfieldHomogeneousLinearSystem:
         A configuration satisfies a constraint if and only if some component
         of the configuration is in contained in the constraint.
         """
-        constraints = []
         # contains tuples of positive and negative support for each linear form
         supports = [
             (set(form.support_pos.nonzero()[0]), set(form.support_neg.nonzero()[0]))
             for form in self.linear_forms
         ]
+        return constraints_from_supports(supports)
 
-        for pos, neg in supports:
-            if 0 in pos:
-                new_constr = {i for i in pos if i > 0}
-                if new_constr not in constraints:
-                    constraints.append(new_constr)
-            elif 0 in neg:
-                new_constr = {i for i in neg if i > 0}
-                if new_constr not in constraints:
-                    constraints.append(new_constr)
-            elif len(pos) and len(neg):
-                pos_constr = set(pos)
-                neg_constr = set(neg)
-                if pos_constr not in constraints:
-                    constraints.append(pos_constr)
-                if neg_constr not in constraints:
-                    constraints.append(neg_constr)
+    def quick_solve_loop_fast(
+        self,
+        support_size: int,
+        as_array: bool = False,
+        backend: str | None = None,
+        prune=None,
+        prune_depth: int = 0,
+        prune_every: int = 1,
+        *,
+        required=(),
+        forbidden=(),
+        exact_size: int | None = None,
+        limit: int | None = None,
+    ):
+        """
+        Computes all supports of size at most support_size satisfying every constraint.
+        Only one support of every pair of reflected supports is returned.
+
+        If required, forbidden, exact_size or limit is given, only the supports
+        matching them are returned and the backend prunes the search with them,
+        see solver_backends.SolverBackend.query. This cannot be combined with prune.
+
+        :param support_size: The maximal size of a support.
+        :param as_array: If True, the supports are returned as a contiguous 2D uint8
+            (or uint16) NumPy array with one sorted support per row, padded with zeros.
+            Otherwise a list of tuples is returned.
+        :param backend: The name of the solver backend, e.g. 'native' or 'numpy'.
+            Defaults to the default backend, see solver_backends.set_default_backend.
+        :param prune: An optional callable that receives a partial support as a tuple
+            and returns True if the search should discard it.
+        :param prune_depth: The first constraint index at which prune is called.
+        :param prune_every: The number of constraints between two calls of prune.
+        :param required: Cells every support must contain.
+        :param forbidden: Cells no support may contain.
+        :param exact_size: If given, only supports of this size are returned.
+        :param limit: If given, the search stops after this many supports.
+        """
+        with tracing.span("quick_solve_loop_fast", support_size=support_size) as s:
+            constraints = self.make_constraints()
+            if required or forbidden or exact_size is not None or limit is not None:
+                assert prune is None, "A query cannot be combined with prune."
+                supports = get_backend(backend).query(
+                    constraints,
+                    support_size,
+                    required,
+                    forbidden,
+                    exact_size,
+                    limit,
+                    as_array,
+                )
+            else:
+                supports = get_backend(backend).quick_solve(
+                    constraints, support_size, as_array, prune, prune_depth, prune_every
+                )
+            s.count(len(supports))
+        return supports
+
+    def count_solutions(self, support_size: int, backend: str | None = None):
+        """
+        Counts the supports that quick_solve_loop_fast returns. The native backend
+        counts without storing the supports as Python objects and traverses the search
+        tree depth first, so its memory only grows with the number of distinct supports.
+
+        :param support_size: The maximal size of a support.
+        :param backend: The name of the solver backend.
+        :return: A solver_backends.SearchCount with the number of supports and,
+            if the backend reports them, the size of the search tree.
+        """
+        return get_backend(backend).count(self.make_constraints(), support_size)
+
+    def estimate_solve(
+        self,
+        support_size: int,
+        probes: int = 1000,
+        seed: int | None = None,
+        confidence: float = 0.95,
+    ):
+        """
+        Estimates the size of the search of quick_solve_loop_fast with random probes,
+        see estimate.estimate_search. This takes milliseconds even if the search
+        would take hours.
+
+        :param support_size: The maximal size of a support.
+        :param probes: The number of random paths through the search tree.
+        :param seed: The seed of the random number generator.
+        :param confidence: The confidence level of the intervals.
+        :return: An estimate.SearchEstimate.
+        """
+        from .estimate import estimate_search
+
+        return estimate_search(
+            self.make_constraints(), support_size, probes, seed, confidence
+        )
+
+    def solve_zdd(self, support_size: int, manager=None):
+        """
+        Computes all supports of size at most support_size satisfying every constraint
+        as a ZDD, see zdd.ZDD.hitting_sets. Unlike quick_solve_loop_fast, the family
+        contains every such support and both supports of a reflected pair. Use
+        ZDD.minimal and ZDD.reflection_quotient to reduce it.
+
+        :param support_size: The maximal size of a support.
+        :param manager: The zdd.ZDDManager storing the nodes. Defaults to a new one.
+        """
+        from .zdd import ZDD
+
+        return ZDD.hitting_sets(self.make_constraints(), support_size, manager)
+
+    @tracing.traced()
+    def quick_solve_range(
+        self,
+        support_sizes,
+        as_array: bool = False,
+        backend: str | None = None,
+        prune=None,
+        prune_depth: int = 0,
+        prune_every: int = 1,
+    ) -> dict:
+        """
+        Computes the result of quick_solve_loop_fast for several support sizes in one search.
+
+        A configuration only grows during the search, so the search for the largest
+        support size passes through every configuration of the searches for smaller
+        sizes. The supports of size at most s that it returns are exactly the supports
+        returned by the search for s.
+
+        :param support_sizes: An iterable of maximal support sizes, e.g. a range.
+        :param as_array: If True, the supports for size s are returned as a 2D array
+            with s columns, see quick_solve_loop_fast.
+        :param backend: The name of the solver backend.
+        :param prune: An optional callable discarding partial supports, see
+            quick_solve_loop_fast. It must not depend on the maximal support size.
+        :param prune_depth: The first constraint index at which prune is called.
+        :param prune_every: The number of constraints between two calls of prune.
+        :return: A dictionary mapping every support size to its supports.
+        """
+        support_sizes = sorted(set(support_sizes))
+        if not support_sizes:
+            return {}
+
+        supports = self.quick_solve_loop_fast(
+            max(support_sizes), True, backend, prune, prune_depth, prune_every
+        )
+        sizes = np.count_nonzero(supports, axis=1)
+
+        results = {}
+        for support_size in support_sizes:
+            rows = supports[sizes <= support_size, : max(support_size, 0)]
+            if as_array:
+                results[support_size] = np.ascontiguousarray(rows)
             else:
-                raise UnsolvableSystemException("Unsolvable system of linear forms")
-
-        to_remove = []
-        for c in constraints:
-            for d in constraints:
-                if c == d:
-                    continue
-                intersected = c.intersection(d)
-                if len(intersected) == len(c):
-                    to_remove.append(d)
-                elif len(intersected) == len(d):
-                    to_remove.append(c)
-
-        return [list(x) for x in constraints if x not in to_remove]
-
-    def quick_solve_loop_fast(self, support_size: int):
-        constraints = self.make_constraints()
-        return solver_ext.quick_solve_loop_cython_int16(constraints, support_size)
+                results[support_size] = [
+                    tuple(int(x) for x in row[row > 0]) for row in rows
+                ]
+        return results
+
+
+def constraints_from_supports(
+    supports: list[tuple[set[int], set[int]]],
+) -> list[list[int]]:
+    """
+    Computes the constraints of a system given the positive and negative support of
+    every linear form, see HyperfieldHomogeneousLinearSystem.make_constraints.
+    """
+    constraints = []
+    for pos, neg in supports:
+        if 0 in pos:
+            new_constr = {i for i in pos if i > 0}
+            if new_constr not in constraints:
+                constraints.append(new_constr)
+        elif 0 in neg:
+            new_constr = {i for i in neg if i > 0}
+            if new_constr not in constraints:
+                constraints.append(new_constr)
+        elif len(pos) and len(neg):
+            pos_constr = set(pos)
+            neg_constr = set(neg)
+            if pos_constr not in constraints:
+                constraints.append(pos_constr)
+            if neg_constr not in constraints:
+                constraints.append(neg_constr)
+        else:
+            raise UnsolvableSystemException("Unsolvable system of linear forms")
+
+    to_remove = []
+    for c in constraints:
+        for d in constraints:
+            if c == d:
+                continue
+            intersected = c.intersection(d)
+            if len(intersected) == len(c):
+                to_remove.append(d)
+            elif len(intersected) == len(d):
+                to_remove.append(c)
+
+    return [list(x) for x in constraints if x not in to_remove]
 
 
 class UnsolvableSystemException(Exception):
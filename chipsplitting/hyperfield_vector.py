@@ -2,6 +2,21 @@ import numpy as np
 
 from . import utils
 
+
+def flatten_triangle(rows: list) -> np.ndarray:
+    """
+    Converts a 2D triangle, given as a list of rows from top to bottom,
+    to its flat array representation.
+    """
+    lengths = [len(row) for row in rows]
+    row_indexes = np.repeat(np.arange(len(rows) - 1, -1, -1), lengths)
+    col_indexes = np.concatenate([np.arange(length) for length in lengths])
+
+    values = np.concatenate(rows)
+    flat = np.zeros_like(values)
+    flat[utils.get_array_indices(col_indexes, row_indexes, len(rows) - 1)] = values
+    return flat
+
 class HyperfieldVector:
     """
     A hyperfield vector is a vector that only contains -1, 0 and 1 values.
@@ -9,24 +24,40 @@ class HyperfieldVector:
     :param values: A list of values that represent the vector. It can be a 2D triangle or a flat list.
     """
 
+    __slots__ = ("values",)
+
     def __init__(self, values: list):
-        if len(values) == 0:
-            self.values = np.array([])
-        elif isinstance(values[0], list):
-            flat = np.full(len(np.concatenate(values)), 0)
-            for r, row in enumerate(values):
-                for c, val in enumerate(row):
-                    flat[utils.get_array_index(c, len(values) - 1 - r)] = val
-                self.values = np.array(flat)
-        else:
-            self.values = np.array(values)
-
-        for x in self.values:
-            assert x in [
-                -1,
-                0,
-                1,
-            ], "Hyperfield vector may only contain -1, 0 and 1 values."
+        if len(values) > 0 and isinstance(values[0], list):
+            values = flatten_triangle(values)
+
+        self.values = HyperfieldVector.validate(np.asarray(values)).astype(np.int8)
+
+    @classmethod
+    def from_array(cls, values: np.ndarray, validate: bool = False):
+        """
+        Creates a hyperfield vector from a flat array.
+        An int8 array is shared with the caller instead of being copied.
+
+        :param values: A flat array that only contains -1, 0 and 1 values.
+        :param validate: If True, checks the values of the array.
+        """
+        values = np.asarray(values)
+        if validate:
+            HyperfieldVector.validate(values)
+
+        vector = cls.__new__(cls)
+        vector.values = values.astype(np.int8, copy=False)
+        return vector
+
+    @staticmethod
+    def validate(values: np.ndarray) -> np.ndarray:
+        """
+        Asserts that the array only contains -1, 0 and 1 values and returns it.
+        """
+        assert np.all(
+            np.isin(values, (-1, 0, 1))
+        ), "Hyperfield vector may only contain -1, 0 and 1 values."
+        return values
 
     @property
     def degree(self):
@@ -34,12 +65,7 @@ class HyperfieldVector:
 
     @property
     def is_valid(self):
-        if self.values[0] > 0:
-            return False
-        for v in self.values[1:]:
-            if v < 0:
-                return False
-        return True
+        return bool(self.values[0] <= 0 and np.all(self.values[1:] >= 0))
 
     def __getitem__(self, key):
         return self.values[key]
@@ -214,4 +240,4 @@ class HyperfieldVector:
             else:
                 values[index_to_update] = 0
 
-        return HyperfieldVector(values)
+        return HyperfieldVector.from_array(values)
@@ -5,6 +5,7 @@ Module contains general linear forms.
 import numpy as np
 from numpy._typing import NDArray
 
+from . import tracing
 from .base_linear_form import BaseLinearForm
 from .hyperfield_linear_form import HyperfieldLinearForm
 
@@ -17,6 +18,8 @@ class LinearForm(BaseLinearForm):
     Class for general linear forms
     """
 
+    __slots__ = ("_support_pos", "_support_neg")
+
     def __init__(self, support_pos: NDArray[np.int_], support_neg: NDArray[np.int_]):
         """
         A linear form is just a sum of x_ij.
@@ -28,6 +31,38 @@ class LinearForm(BaseLinearForm):
         self._support_pos = np.array(support_pos)
         self._support_neg = np.array(support_neg)
 
+    @classmethod
+    def from_array(
+        cls,
+        support_pos: NDArray[np.int_],
+        support_neg: NDArray[np.int_],
+        validate: bool = False,
+    ):
+        """
+        Creates a linear form without copying the input arrays.
+        The arrays are shared with the caller and must not be modified afterwards.
+
+        :param support_pos: The non-negative coefficients of the positive support.
+        :param support_neg: The non-negative coefficients of the negative support.
+        :param validate: If True, checks that both supports are flat arrays of
+            the same size with non-negative coefficients.
+        """
+        support_pos = np.asarray(support_pos)
+        support_neg = np.asarray(support_neg)
+
+        if validate:
+            assert support_pos.ndim == 1, "Supports must be flat arrays."
+            assert (
+                support_pos.shape == support_neg.shape
+            ), "Positive and negative support must have the same size."
+            assert np.all(support_pos >= 0)
+            assert np.all(support_neg >= 0)
+
+        form = cls.__new__(cls)
+        form._support_pos = support_pos
+        form._support_neg = support_neg
+        return form
+
     @classmethod
     def zero(cls, degree: int):
         """
@@ -94,63 +129,22 @@ class LinearForm(BaseLinearForm):
         )
 
     def __neg__(self):
-        return LinearForm(self.support_neg, self.support_pos)
+        return LinearForm.from_array(self.support_neg, self.support_pos)
 
     def __add__(self, other):
-        support_pos = np.array([0] * gauss(self.degree + 1))
-        support_neg = np.array([0] * gauss(self.degree + 1))
-
-        for i in range(support_pos.size):
-            val = (
-                self.support_pos[i]
-                - self.support_neg[i]
-                + other.support_pos[i]
-                - other.support_neg[i]
-            )
-            if val > 0:
-                support_pos[i] = val
-            elif val < 0:
-                support_neg[i] = -val
-
-        return LinearForm(support_pos, support_neg)
+        val = self.support_pos - self.support_neg + other.support_pos - other.support_neg
+        return LinearForm.from_array(np.maximum(val, 0), np.maximum(-val, 0))
 
     def __sub__(self, other):
-        support_pos = np.array([0] * gauss(self.degree + 1))
-        support_neg = np.array([0] * gauss(self.degree + 1))
-
-        for i in range(support_pos.size):
-            val = (
-                self.support_pos[i]
-                - self.support_neg[i]
-                - other.support_pos[i]
-                + other.support_neg[i]
-            )
-            if val > 0:
-                support_pos[i] = val
-            elif val < 0:
-                support_neg[i] = -val
-
-        return LinearForm(support_pos, support_neg)
+        val = self.support_pos - self.support_neg - other.support_pos + other.support_neg
+        return LinearForm.from_array(np.maximum(val, 0), np.maximum(-val, 0))
 
+    @tracing.traced()
     def to_hyperfield(self) -> HyperfieldLinearForm:
         """
         Converts the Pascal form to a hyperfield linear form.
         """
-        support_pos = np.full(gauss(self.degree + 1), False)
-        support_neg = np.full(gauss(self.degree + 1), False)
-
-        for index, val in enumerate(self.support_pos):
-            if val > 0:
-                support_pos[index] = True
-
-        for (
-            index,
-            val,
-        ) in enumerate(self.support_neg):
-            if val > 0:
-                support_neg[index] = True
-
-        return HyperfieldLinearForm(support_pos, support_neg)
+        return HyperfieldLinearForm.from_array(self.support_pos > 0, self.support_neg > 0)
 
     def get(self, contraction_size, key):
         if type(key) is not str:
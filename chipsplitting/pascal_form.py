@@ -4,6 +4,7 @@ Module for Pascal forms
 
 import numpy as np
 
+from . import tracing
 from .hyperfield_linear_form import HyperfieldLinearForm
 from .utils.binomial import ncr
 
@@ -80,6 +81,9 @@ class PascalForm(LinearForm):
     Class for Pascal forms.
     """
 
+    __slots__ = ("_mode",)
+
+    @tracing.traced("PascalForm")
     def __init__(self, degree: int, mode: str, unit: int):
         """
         Constructor for Pascal forms.
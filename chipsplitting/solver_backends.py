@@ -0,0 +1,451 @@
+"""
+Module containing the backends that search for supports satisfying a list of constraints.
+
+A backend is registered under a name and loaded lazily the first time it is requested,
+so a missing or stale build of the compiled extension only affects the native backend.
+"""
+
+import abc
+import os
+import warnings
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from . import tracing
+from .utils import (
+    canonicalize_supports,
+    gauss,
+    reflect_indices,
+    reflect_supports,
+    sort_supports,
+    support_dtype,
+)
+
+
+class SearchCount(NamedTuple):
+    """
+    The result of SolverBackend.count.
+    """
+
+    supports: int
+    # The number of nodes and leaves of the search tree, None if the backend
+    # does not report them
+    nodes: Optional[int] = None
+    leaves: Optional[int] = None
+
+
+class SolverBackend(abc.ABC):
+    """
+    Abstract class for support search backends.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def quick_solve(
+        self,
+        constraints: list[list[int]],
+        support_size: int,
+        as_array: bool = False,
+        prune: Optional[Callable[[tuple], bool]] = None,
+        prune_depth: int = 0,
+        prune_every: int = 1,
+    ):
+        """
+        Computes all supports of size at most support_size that intersect every constraint.
+        Only one support of every pair of reflected supports is returned.
+        The constraints are processed in the order of a stable sort by size, which
+        determines the non-minimal supports that are returned.
+
+        :param constraints: A list of constraints, each given as a list of cell indices.
+        :param support_size: The maximal size of a support.
+        :param as_array: If True, the supports are returned as a 2D uint8 (or uint16)
+            NumPy array with one sorted, zero padded support per row.
+            Otherwise a list of tuples is returned.
+        :param prune: An optional callable that receives a partial support as a tuple
+            and returns True if it cannot be extended to a solution. The partial supports
+            are checked before the constraints with index prune_depth,
+            prune_depth + prune_every, ... are processed, where the constraints are
+            ordered by size and the index len(constraints) stands for the final supports.
+        :param prune_depth: The first constraint index at which prune is called.
+        :param prune_every: The number of constraints between two calls of prune.
+        """
+
+    def count(self, constraints: list[list[int]], support_size: int) -> SearchCount:
+        """
+        Counts the supports that quick_solve returns. Backends that can count without
+        storing the supports override this, the default runs the search.
+        """
+        return SearchCount(len(self.quick_solve(constraints, support_size, True)))
+
+    def query(
+        self,
+        constraints: list[list[int]],
+        support_size: int,
+        required: Iterable[int] = (),
+        forbidden: Iterable[int] = (),
+        exact_size: Optional[int] = None,
+        limit: Optional[int] = None,
+        as_array: bool = False,
+    ):
+        """
+        Computes the supports of quick_solve that contain every required cell, avoid
+        every forbidden cell and have exactly exact_size cells. If only the reflection
+        of a support matches, the reflection is returned instead. Backends that can
+        push the query into the search override this, the default runs the search
+        with the size limit and filters its result.
+
+        Which supports are returned if limit is reached depends on the backend.
+
+        :param constraints: A list of constraints, each given as a list of cell indices.
+        :param support_size: The maximal size of a support.
+        :param required: Cells every support must contain.
+        :param forbidden: Cells no support may contain.
+        :param exact_size: If given, only supports of this size are returned.
+        :param limit: If given, at most this many supports are returned.
+        :param as_array: If True, the supports are returned as a 2D uint8 (or uint16)
+            NumPy array with one sorted, zero padded support per row.
+            Otherwise a list of tuples is returned.
+        """
+        assert limit is None or limit >= 0, "The limit must be non-negative."
+        assert exact_size is None or exact_size > 0, "The exact size must be positive."
+        cap = support_size if exact_size is None else min(support_size, exact_size)
+        supports = match_supports(
+            self.quick_solve(constraints, cap, True),
+            constraints_degree(constraints),
+            required,
+            forbidden,
+            exact_size,
+        )[:limit]
+        if as_array:
+            return supports
+        return [tuple(int(x) for x in row[row > 0]) for row in supports]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name: {self.name})"
+
+
+class NativeBackend(SolverBackend):
+    """
+    Backend using the compiled C++ extension.
+    """
+
+    name = "native"
+
+    # The version and entry points the compiled extension has to provide.
+    # An older build imports fine but fails on the first call, so it is rejected here.
+    abi_version = 1
+    entry_points = (
+        "quick_solve_loop_cython_int16",
+        "count_solutions_cython_int16",
+        "query_solutions_cython_int16",
+    )
+
+    def __init__(self):
+        from . import solver_ext
+
+        missing = [name for name in self.entry_points if not hasattr(solver_ext, name)]
+        version = getattr(solver_ext, "ABI_VERSION", None)
+        if missing or version != self.abi_version:
+            raise ImportError(
+                f"Stale build of the native extension (version {version}, expected "
+                f"{self.abi_version}), run 'python setup.py build_ext --inplace'."
+            )
+        self._solver_ext = solver_ext
+
+    def quick_solve(
+        self,
+        constraints: list[list[int]],
+        support_size: int,
+        as_array: bool = False,
+        prune: Optional[Callable[[tuple], bool]] = None,
+        prune_depth: int = 0,
+        prune_every: int = 1,
+    ):
+        with tracing.span("native.quick_solve", support_size=support_size) as s:
+            supports = self._solver_ext.quick_solve_loop_cython_int16(
+                constraints, support_size, as_array, prune, prune_depth, prune_every
+            )
+            s.count(len(supports))
+        return supports
+
+    def count(self, constraints: list[list[int]], support_size: int) -> SearchCount:
+        with tracing.span("native.count", support_size=support_size) as s:
+            result = SearchCount(
+                *self._solver_ext.count_solutions_cython_int16(
+                    constraints, support_size
+                )
+            )
+            s.count(result.supports)
+        return result
+
+    def query(
+        self,
+        constraints: list[list[int]],
+        support_size: int,
+        required: Iterable[int] = (),
+        forbidden: Iterable[int] = (),
+        exact_size: Optional[int] = None,
+        limit: Optional[int] = None,
+        as_array: bool = False,
+    ):
+        assert limit is None or limit >= 0, "The limit must be non-negative."
+        assert exact_size is None or exact_size > 0, "The exact size must be positive."
+        required, forbidden = sorted(set(required)), sorted(set(forbidden))
+        degree = constraints_degree(constraints)
+        cap = support_size if exact_size is None else min(support_size, exact_size)
+        # No support contains a cell outside of the triangle
+        num_cells = gauss(degree + 1)
+        forbidden = [cell for cell in forbidden if 0 <= cell < num_cells]
+        valid = all(0 <= cell < num_cells for cell in required)
+        with tracing.span("native.query", support_size=support_size) as s:
+            queries = [(required, forbidden)] if valid else []
+            # The search only finds supports that it reaches itself. To find those
+            # whose reflection matches, the reflected query is searched as well.
+            reflected = [
+                sorted(int(x) for x in reflect_indices(np.array(cells, int), degree))
+                for cells in (required if valid else [], forbidden)
+            ]
+            if valid and reflected != [required, forbidden]:
+                queries.append(tuple(reflected))
+
+            found = [np.zeros((0, max(cap, 0)), dtype=support_dtype(degree))]
+            for k, (req, forb) in enumerate(queries):
+                supports = self._solver_ext.query_solutions_cython_int16(
+                    constraints,
+                    support_size,
+                    req,
+                    forb,
+                    0 if exact_size is None else exact_size,
+                    -1 if limit is None else limit,
+                    True,
+                )
+                if k:
+                    supports = reflect_supports(supports, degree)
+                found.append(supports)
+            supports = match_supports(
+                np.concatenate(found), degree, required, forbidden, exact_size
+            )[:limit]
+            s.count(len(supports))
+
+        if as_array:
+            return supports
+        return [tuple(int(x) for x in row[row > 0]) for row in supports]
+
+
+class NumpyBackend(SolverBackend):
+    """
+    Pure NumPy backend. Configurations are stored as rows of 64 bit words,
+    one bit per cell, and every constraint is processed for all configurations at once.
+    Duplicate configurations are removed after every constraint.
+
+    The constraints are ordered by size with a stable sort like in the native backend,
+    so both backends return the same supports.
+    """
+
+    name = "numpy"
+
+    @tracing.traced("numpy.quick_solve", items=len)
+    def quick_solve(
+        self,
+        constraints: list[list[int]],
+        support_size: int,
+        as_array: bool = False,
+        prune: Optional[Callable[[tuple], bool]] = None,
+        prune_depth: int = 0,
+        prune_every: int = 1,
+    ):
+        constraints = sorted(constraints, key=len)
+        num_cells = 1 + max((max(c) for c in constraints if len(c)), default=0)
+        num_words = (num_cells + 63) // 64
+
+        confs = np.zeros((1, num_words), dtype=np.uint64)
+        sizes = np.zeros(1, dtype=np.int64)
+
+        for level in range(len(constraints) + 1):
+            if (
+                prune is not None
+                and level >= prune_depth
+                and (level - prune_depth) % max(prune_every, 1) == 0
+            ):
+                supports = bitsets_to_supports(confs, num_cells, max(support_size, 0))
+                keep = [
+                    not prune(tuple(int(x) for x in row[row > 0])) for row in supports
+                ]
+                confs, sizes = confs[keep], sizes[keep]
+            if level == len(constraints):
+                break
+
+            constr = constraints[level]
+            mask = cells_to_bitset(constr, num_words)
+            satisfy = np.any(confs & mask, axis=1)
+            grow = ~satisfy & (sizes < support_size)
+
+            new_confs = [confs[satisfy]]
+            new_sizes = [sizes[satisfy]]
+            for j in constr:
+                extended = confs[grow]
+                extended[:, j // 64] |= np.uint64(1 << (j % 64))
+                new_confs.append(extended)
+                new_sizes.append(sizes[grow] + 1)
+
+            confs, first = unique_rows(np.concatenate(new_confs))
+            sizes = np.concatenate(new_sizes)[first]
+
+        with tracing.span("numpy.collect") as s:
+            supports = bitsets_to_supports(confs, num_cells, max(support_size, 0))
+            degree = constraints_degree(constraints)
+            supports, _ = unique_rows(canonicalize_supports(supports, degree))
+            supports = supports.astype(support_dtype(degree))
+            s.count(len(supports))
+
+            if as_array:
+                return supports
+            return [tuple(int(x) for x in row[row > 0]) for row in supports]
+
+
+def constraints_degree(constraints: list[list[int]]) -> int:
+    """
+    Returns the smallest degree whose triangle contains every cell of the constraints.
+    """
+    num_cells = 1 + max((max(c) for c in constraints if len(c)), default=0)
+    return next(d for d in range(num_cells + 1) if gauss(d + 1) >= num_cells)
+
+
+def match_supports(
+    supports: np.ndarray,
+    degree: int,
+    required: Iterable[int] = (),
+    forbidden: Iterable[int] = (),
+    exact_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Replaces every zero padded support by the lexicographically smaller one of the
+    support and its reflection that contain every required cell, avoid every
+    forbidden cell and have exact_size cells, and drops it if neither does.
+    Returns the sorted unique rows.
+    """
+
+    def matches(rows: np.ndarray) -> np.ndarray:
+        keep = np.ones(len(rows), dtype=bool)
+        for cell in set(required):
+            keep &= np.any((rows == cell) & (rows > 0), axis=1)
+        keep &= ~np.any(np.isin(rows, list(forbidden)) & (rows > 0), axis=1)
+        if exact_size is not None:
+            keep &= np.count_nonzero(rows, axis=1) == exact_size
+        return keep
+
+    supports = sort_supports(supports)
+    reflected = reflect_supports(supports, degree)
+    use_support, use_reflected = matches(supports), matches(reflected)
+    use_reflected &= ~use_support | (
+        canonicalize_supports(supports, degree) == reflected
+    ).all(axis=1)
+    use_support &= ~use_reflected
+    supports, _ = unique_rows(
+        np.concatenate([supports[use_support], reflected[use_reflected]])
+    )
+    return supports.astype(support_dtype(degree))
+
+
+def unique_rows(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the lexicographically sorted unique rows of a 2D array
+    together with the index of one occurrence of each of them.
+    """
+    order = np.lexsort(rows.T[::-1])
+    rows = rows[order]
+    is_new = np.ones(len(rows), dtype=bool)
+    is_new[1:] = np.any(rows[1:] != rows[:-1], axis=1)
+    return rows[is_new], order[is_new]
+
+
+def cells_to_bitset(cells: list[int], num_words: int) -> np.ndarray:
+    """
+    Converts a list of cell indices to a bitset of num_words 64 bit words.
+    """
+    bits = np.zeros(num_words * 64, dtype=np.uint8)
+    bits[list(cells)] = 1
+    return np.packbits(bits, bitorder="little").view("<u8").astype(np.uint64)
+
+
+def bitsets_to_supports(confs: np.ndarray, num_cells: int, width: int) -> np.ndarray:
+    """
+    Converts rows of bitsets to sorted supports padded with zeros to the given width.
+    """
+    bits = np.unpackbits(
+        confs.astype("<u8").view(np.uint8), axis=1, bitorder="little"
+    )[:, :num_cells].astype(bool)
+    order = np.argsort(~bits, axis=1, kind="stable")[:, :width]
+    supports = np.where(np.take_along_axis(bits, order, axis=1), order, 0)
+    # A support has at most num_cells cells, the remaining columns are padding
+    return np.pad(supports, ((0, 0), (0, width - supports.shape[1])))
+
+
+_BACKEND_FACTORIES: dict[str, Callable[[], SolverBackend]] = {
+    NativeBackend.name: NativeBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+_BACKENDS: dict[str, SolverBackend] = {}
+_default_backend: Optional[str] = os.environ.get("CHIPSPLITTING_BACKEND")
+
+
+def register_backend(name: str, factory: Callable[[], SolverBackend]):
+    """
+    Registers a backend. The factory is called the first time the backend is requested.
+    """
+    _BACKEND_FACTORIES[name] = factory
+    _BACKENDS.pop(name, None)
+
+
+def set_default_backend(name: Optional[str]):
+    """
+    Sets the backend that is used if no backend is requested explicitly.
+    If name is None, the native backend is used if it can be loaded
+    and the NumPy backend otherwise.
+    """
+    if name is not None and name not in _BACKEND_FACTORIES:
+        raise ValueError(f"Unknown solver backend '{name}'.")
+    global _default_backend
+    _default_backend = name
+
+
+def get_backend(name: Optional[str] = None) -> SolverBackend:
+    """
+    Returns the backend with the given name, loading it if necessary.
+
+    :param name: The name of the backend. Defaults to the default backend.
+    """
+    if name is None:
+        name = _default_backend
+    if name is None:
+        try:
+            return get_backend(NativeBackend.name)
+        except ImportError as exc:
+            warnings.warn(
+                f"Native solver backend unavailable ({exc}), using the NumPy backend.",
+                RuntimeWarning,
+            )
+            set_default_backend(NumpyBackend.name)
+            return get_backend(NumpyBackend.name)
+
+    if name not in _BACKENDS:
+        if name not in _BACKEND_FACTORIES:
+            raise ValueError(f"Unknown solver backend '{name}'.")
+        _BACKENDS[name] = _BACKEND_FACTORIES[name]()
+    return _BACKENDS[name]
+
+
+def available_backends() -> list[str]:
+    """
+    Returns the names of all registered backends that can be loaded.
+    """
+    names = []
+    for name in _BACKEND_FACTORIES:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
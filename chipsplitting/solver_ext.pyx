@@ -2,69 +2,226 @@
 # Tells cython to compile using C++
 # distutils: language = c++
 
+import numpy as np
+
 from libcpp.vector cimport vector
 from libcpp.deque cimport deque
 from libcpp.unordered_set cimport unordered_set
-from libcpp.algorithm cimport sort
-from libc.stdint cimport int8_t
+from libcpp.string cimport string
+from libcpp.algorithm cimport binary_search, sort, stable_sort, unique
+from libcpp.utility cimport move
+from libc.stdint cimport int16_t, uint8_t, uint16_t
 from libc.stddef cimport size_t
 from libc.math cimport sqrt
 
-cdef int8_t gauss(int8_t n):
+# Cells are stored as 16 bit integers so that degrees beyond 14 fit as well
+ctypedef int16_t cell_t
+
+# Incremented whenever an entry point changes, see solver_backends.NativeBackend
+ABI_VERSION = 1
+
+cdef cell_t gauss(cell_t n):
     return (n * (n + 1)) // 2
 
-cdef int8_t get_array_index(int8_t col, int8_t row):
+cdef cell_t get_array_index(cell_t col, cell_t row):
     return gauss(col + row) + col
 
-cdef vector[int8_t] to_coordinate(int8_t n):
-    cdef vector[int8_t] result_vector
+cdef vector[cell_t] to_coordinate(cell_t n):
+    cdef vector[cell_t] result_vector
     cdef double degree_float
-    cdef int8_t degree, s
+    cdef cell_t degree, s
     degree_float = -1.5 + sqrt(0.25 + 2.0 * n)
-    degree = <int8_t>degree_float + 1
+    degree = <cell_t>degree_float + 1
     s = gauss(degree)
     result_vector.push_back(n - s)
     result_vector.push_back(degree - n + s)
     return result_vector
 
-cdef vector[int8_t] reflect_support_cpp(const vector[int8_t]& support):
+cdef vector[cell_t] reflect_support_cpp(const vector[cell_t]& support):
     """
     Fully C++ internal version. Accepts and returns C++ vectors.
     """
-    cdef vector[int8_t] reflected_vector
+    cdef vector[cell_t] reflected_vector
     cdef size_t n = support.size()
     reflected_vector.reserve(n) # Pre-allocate memory
 
     # Declare loop variables
     cdef size_t i
-    cdef int8_t item
-    cdef vector[int8_t] coord
+    cdef cell_t item
+    cdef vector[cell_t] coord
 
     # Use an index-based loop for C++ vectors
     for i in range(n):
         item = support[i]
         coord = to_coordinate(item)
         reflected_vector.push_back(get_array_index(coord[1], coord[0]))
-        
+
     return reflected_vector
 
 # Helper function for sorting (unchanged)
-cdef bint compare_sets(const unordered_set[int8_t]& a, const unordered_set[int8_t]& b) nogil:
+cdef bint compare_sets(const unordered_set[cell_t]& a, const unordered_set[cell_t]& b) nogil:
     return a.size() < b.size()
 
-def quick_solve_loop_cython_int16(list py_constraints, int support_size):
+cdef bint compare_sizes(const vector[cell_t]& a, const vector[cell_t]& b) nogil:
+    return a.size() < b.size()
+
+cdef bint contains(const vector[cell_t]& constr, cell_t cell) nogil:
+    cdef size_t k
+    for k in range(constr.size()):
+        if constr[k] == cell:
+            return True
+    return False
+
+cdef list collect_tuples(deque[vector[cell_t]]& queue):
+    """
+    Converts the final queue into a list of sorted tuples, keeping only one
+    configuration of every pair of reflected configurations.
+    """
+    cdef vector[cell_t] final_conf, reflected_vec
+    cdef set final_set = set()
+
+    while not queue.empty():
+        final_conf = queue.front()
+        queue.pop_front()
+
+        # Create the canonical (sorted) tuple form of the configuration
+        sort(final_conf.begin(), final_conf.end())
+        conf_tuple = tuple(final_conf)
+
+        # Create the canonical (sorted) tuple form of its reflection
+        reflected_vec = reflect_support_cpp(final_conf)
+        sort(reflected_vec.begin(), reflected_vec.end())
+        reflected_tuple = tuple(reflected_vec)
+
+        # Check if this configuration OR its reflection is already in the set
+        if conf_tuple not in final_set and reflected_tuple not in final_set:
+            # If neither is present, add the current configuration's tuple.
+            # This ensures only one of a symmetric pair is ever added.
+            final_set.add(conf_tuple)
+
+    return list(final_set)
+
+cdef object rows_dtype(cell_t max_cell):
+    """
+    Returns uint8 if every cell of the smallest triangle containing max_cell fits
+    into it and uint16 otherwise, like utils.support_dtype, so the dtype only
+    depends on the degree of the constraints.
+    """
+    cdef size_t degree = 0
+    while (degree + 1) * (degree + 2) // 2 <= <size_t>max_cell:
+        degree += 1
+    return np.uint8 if (degree + 1) * (degree + 2) // 2 <= 256 else np.uint16
+
+cdef object rows_to_array(
+    vector[vector[cell_t]]& rows, size_t width, cell_t max_cell
+):
+    """
+    Copies the rows into a 2D NumPy array of the given width, padding every row with
+    zeros at the end. max_cell is the largest cell of the constraints.
+    """
+    cdef size_t r, k
+    cdef uint8_t[:, ::1] view8
+    cdef uint16_t[:, ::1] view16
+
+    dtype = rows_dtype(max_cell)
+    result = np.zeros((rows.size(), width), dtype=dtype)
+    if dtype is np.uint8:
+        view8 = result
+        for r in range(rows.size()):
+            for k in range(min(rows[r].size(), width)):
+                view8[r, k] = <uint8_t>rows[r][k]
+    else:
+        view16 = result
+        for r in range(rows.size()):
+            for k in range(min(rows[r].size(), width)):
+                view16[r, k] = <uint16_t>rows[r][k]
+    return result
+
+cdef object collect_array(
+    deque[vector[cell_t]]& queue, size_t width, cell_t max_cell
+):
+    """
+    Converts the final queue into a 2D NumPy array with one configuration per row.
+    Every row is sorted and padded with zeros at the end. Of every pair of
+    reflected configurations only the lexicographically smaller row is kept.
+    max_cell is the largest cell of the constraints and determines the dtype.
+    """
+    cdef vector[vector[cell_t]] rows
+    cdef vector[cell_t] final_conf, reflected_vec
+
+    # Canonicalize every configuration into a padded row of fixed width
+    rows.reserve(queue.size())
+    while not queue.empty():
+        final_conf = move(queue.front())
+        queue.pop_front()
+
+        sort(final_conf.begin(), final_conf.end())
+        reflected_vec = reflect_support_cpp(final_conf)
+        sort(reflected_vec.begin(), reflected_vec.end())
+
+        final_conf.resize(width, 0)
+        reflected_vec.resize(width, 0)
+        if reflected_vec < final_conf:
+            final_conf.swap(reflected_vec)
+        rows.push_back(move(final_conf))
+
+    # Equal rows are adjacent after sorting, so duplicates are dropped in one pass
+    sort(rows.begin(), rows.end())
+    rows.erase(unique(rows.begin(), rows.end()), rows.end())
+
+    return rows_to_array(rows, width, max_cell)
+
+cdef int prune_queue(deque[vector[cell_t]]& queue, object prune) except -1:
+    """
+    Removes every configuration from the queue for which prune returns True.
+    """
+    cdef size_t current_queue_size = queue.size()
+    cdef vector[cell_t] conf
+
+    for _ in range(current_queue_size):
+        conf = move(queue.front())
+        queue.pop_front()
+        if not prune(tuple(conf)):
+            queue.push_back(move(conf))
+    return 0
+
+def quick_solve_loop_cython_int16(
+    list py_constraints,
+    int support_size,
+    bint as_array=False,
+    object prune=None,
+    int prune_depth=0,
+    int prune_every=1,
+):
+    """
+    Searches for all configurations of size at most support_size that intersect
+    every constraint.
+
+    :param py_constraints: A list of constraints, each given as a list of cell indices.
+    :param support_size: The maximal size of a configuration.
+    :param as_array: If True, the configurations are returned as a 2D uint8 (or uint16)
+        NumPy array with one sorted, zero padded configuration per row.
+        Otherwise a list of tuples is returned.
+    :param prune: An optional callable that receives a configuration as a tuple and
+        returns True if the configuration cannot lead to a solution. It is called for
+        every configuration in the queue before the constraint at index prune_depth,
+        prune_depth + prune_every, ... is processed. The index len(py_constraints)
+        stands for the final queue.
+    :param prune_depth: The first constraint index at which prune is called.
+    :param prune_every: The number of constraints between two calls of prune.
+    """
     # === Part 0: C-level variable declarations ===
-    cdef vector[unordered_set[int8_t]] constraints
-    cdef unordered_set[int8_t] constr_set, constr
+    cdef vector[unordered_set[cell_t]] constraints
+    cdef unordered_set[cell_t] constr_set, constr
     cdef list py_constr
     cdef int item
     cdef size_t current_queue_size
 
-    cdef deque[vector[int8_t]] queue
+    cdef deque[vector[cell_t]] queue
     cdef bint satisfy
-    cdef vector[int8_t] conf, new_conf, final_conf
-    cdef int8_t i, j
-    cdef set final_set = set()
+    cdef vector[cell_t] conf, new_conf
+    cdef cell_t i, j, max_cell = 0
+    cdef size_t level, num_constraints
 
     # === Part 1: Convert Python list of lists to C++ vector of sets ===
     constraints.reserve(len(py_constraints))
@@ -72,14 +229,29 @@ def quick_solve_loop_cython_int16(list py_constraints, int support_size):
         constr_set.clear()
         constr_set.reserve(<size_t>len(py_constr))
         for item in py_constr:
-            constr_set.insert(<int8_t>item)
+            constr_set.insert(<cell_t>item)
+            if item > max_cell:
+                max_cell = <cell_t>item
         constraints.push_back(constr_set)
 
-    sort(constraints.begin(), constraints.end(), compare_sets)
+    # A stable sort keeps constraints of equal size in their given order, like the
+    # NumPy backend, so the search tree and its supports do not depend on the backend
+    stable_sort(constraints.begin(), constraints.end(), compare_sets)
 
     # === Part 2: Main algorithm similar to Bik and Marigliano ===
-    queue.push_back(vector[int8_t]())
-    for constr in constraints:
+    num_constraints = constraints.size()
+    queue.push_back(vector[cell_t]())
+    for level in range(num_constraints + 1):
+        if (
+            prune is not None
+            and <int>level >= prune_depth
+            and (<int>level - prune_depth) % max(prune_every, 1) == 0
+        ):
+            prune_queue(queue, prune)
+        if level == num_constraints:
+            break
+
+        constr = constraints[level]
         current_queue_size = queue.size()
         for _ in range(current_queue_size):
             conf = queue.front()
@@ -99,24 +271,278 @@ def quick_solve_loop_cython_int16(list py_constraints, int support_size):
                     queue.push_back(conf) # Pushes a copy of the modified vector
                     conf.pop_back()       # Backtrack to restore 'conf'
 
-    # === Part 3: Convert the C++ results back to a Python list ===
-    while not queue.empty():
-        final_conf = queue.front()
-        queue.pop_front()
-        
-        # Create the canonical (sorted) tuple form of the configuration
-        sort(final_conf.begin(), final_conf.end())
-        conf_tuple = tuple(final_conf)
+    # === Part 3: Convert the C++ results back to Python ===
+    if as_array:
+        return collect_array(queue, <size_t>max(support_size, 0), max_cell)
+    return collect_tuples(queue)
 
-        # Create the canonical (sorted) tuple form of its reflection
-        reflected_vec = reflect_support_cpp(final_conf)
-        sort(reflected_vec.begin(), reflected_vec.end())
-        reflected_tuple = tuple(reflected_vec)
+cdef string canonical_key(vector[cell_t] conf):
+    """
+    Returns the bytes of the sorted configuration or of its sorted reflection,
+    whichever is lexicographically smaller, as a key for a hash set.
+    """
+    cdef vector[cell_t] reflected_vec
+    sort(conf.begin(), conf.end())
+    reflected_vec = reflect_support_cpp(conf)
+    sort(reflected_vec.begin(), reflected_vec.end())
+    if reflected_vec < conf:
+        conf.swap(reflected_vec)
+    return string(<char*>conf.data(), conf.size() * sizeof(cell_t))
 
-        # Check if this configuration OR its reflection is already in the set
-        if conf_tuple not in final_set and reflected_tuple not in final_set:
-            # If neither is present, add the current configuration's tuple.
-            # This ensures only one of a symmetric pair is ever added.
-            final_set.add(conf_tuple)
+def count_solutions_cython_int16(list py_constraints, int support_size):
+    """
+    Counts the configurations that quick_solve_loop_cython_int16 returns without
+    building them as Python objects.
 
-    return list(final_set)
+    The search tree is traversed depth first, so only one path of configurations is
+    kept at a time. The distinct leaves are stored as compact byte strings of their
+    canonical form in a hash set.
+
+    :param py_constraints: A list of constraints, each given as a list of cell indices.
+    :param support_size: The maximal size of a configuration.
+    :return: A tuple of the number of distinct configurations up to reflection,
+        the number of nodes of the search tree and the number of its leaves,
+        i.e. configurations satisfying every constraint, counted with multiplicity.
+    """
+    cdef vector[vector[cell_t]] constraints
+    cdef vector[cell_t] constr_vec
+    cdef unordered_set[cell_t] constr_set
+    cdef list py_constr
+    cdef int item
+
+    cdef vector[cell_t] conf
+    cdef vector[size_t] levels, branches
+    cdef unordered_set[string] leaves
+    cdef size_t level, branch, num_constraints
+    cdef size_t num_nodes = 1, num_leaves = 0
+    cdef bint satisfy
+    cdef cell_t i
+
+    # Constraints as sorted vectors without duplicates, ordered like the BFS
+    constraints.reserve(len(py_constraints))
+    for py_constr in py_constraints:
+        constr_set.clear()
+        for item in py_constr:
+            constr_set.insert(<cell_t>item)
+        constr_vec.assign(constr_set.begin(), constr_set.end())
+        constraints.push_back(constr_vec)
+    stable_sort(constraints.begin(), constraints.end(), compare_sizes)
+    num_constraints = constraints.size()
+
+    # levels[k] is the constraint at which the k-th cell of conf was added and
+    # branches[k] the index of that cell in the constraint
+    level = 0
+    while True:
+        # Descend while the configuration satisfies the constraints
+        while level < num_constraints:
+            satisfy = False
+            for i in conf:
+                if contains(constraints[level], i):
+                    satisfy = True
+                    break
+            if not satisfy:
+                break
+            level += 1
+            num_nodes += 1
+
+        if level == num_constraints:
+            num_leaves += 1
+            leaves.insert(canonical_key(conf))
+        elif conf.size() < <size_t>support_size and constraints[level].size():
+            conf.push_back(constraints[level][0])
+            levels.push_back(level)
+            branches.push_back(0)
+            level += 1
+            num_nodes += 1
+            continue
+
+        # Backtrack to the last cell with a remaining sibling
+        while not levels.empty():
+            conf.pop_back()
+            level = levels.back()
+            branch = branches.back() + 1
+            if branch < constraints[level].size():
+                conf.push_back(constraints[level][branch])
+                branches[branches.size() - 1] = branch
+                level += 1
+                num_nodes += 1
+                break
+            levels.pop_back()
+            branches.pop_back()
+        else:
+            break
+
+    return leaves.size(), num_nodes, num_leaves
+
+cdef bint matches_query(
+    vector[cell_t]& conf,
+    vector[cell_t]& required,
+    unordered_set[cell_t]& forbidden,
+    size_t exact_size,
+):
+    """
+    Returns true if the sorted configuration contains every required cell, no
+    forbidden cell and, unless exact_size is 0, has exactly exact_size cells.
+    """
+    cdef size_t k
+    cdef cell_t cell
+    if exact_size and conf.size() != exact_size:
+        return False
+    for cell in conf:
+        if forbidden.count(cell):
+            return False
+    for k in range(required.size()):
+        if not binary_search(conf.begin(), conf.end(), required[k]):
+            return False
+    return True
+
+def query_solutions_cython_int16(
+    list py_constraints,
+    int support_size,
+    list required=None,
+    list forbidden=None,
+    int exact_size=0,
+    long long limit=-1,
+    bint as_array=False,
+):
+    """
+    Searches for the configurations of quick_solve_loop_cython_int16 that contain
+    every required cell, avoid every forbidden cell and have exact_size cells,
+    pruning the search tree instead of filtering the result.
+
+    The tree is traversed depth first with the constraints in the same order as the
+    breadth-first search. Forbidden cells are removed from the constraints after
+    sorting them, so the remaining tree is the tree of quick_solve_loop_cython_int16
+    restricted to configurations without forbidden cells. A branch is cut as soon as
+    a missing required cell cannot be added anymore, because no later constraint
+    contains it or the size limit leaves no room for it.
+
+    Of a pair of reflected configurations that both match, only the lexicographically
+    smaller one is returned. If only one of them matches, that one is returned.
+
+    :param py_constraints: A list of constraints, each given as a list of cell indices.
+    :param support_size: The maximal size of a configuration.
+    :param required: Cells every configuration must contain.
+    :param forbidden: Cells no configuration may contain.
+    :param exact_size: If positive, only configurations of this size are returned.
+    :param limit: If non-negative, the search stops after this many configurations.
+    :param as_array: If True, the configurations are returned as a 2D uint8 (or uint16)
+        NumPy array with one sorted, zero padded configuration per row, sorted
+        lexicographically. Otherwise a list of sorted tuples is returned.
+    """
+    cdef vector[vector[cell_t]] constraints
+    cdef vector[cell_t] constr_vec, required_vec, conf, sorted_conf, reflected_vec
+    cdef unordered_set[cell_t] constr_set, forbidden_set
+    cdef vector[size_t] last_level, levels, branches
+    cdef vector[vector[cell_t]] results
+    cdef unordered_set[string] seen
+    cdef string key
+    cdef list py_constr
+    cdef int item
+    cdef size_t level, branch, num_constraints, k, missing, cap
+    cdef bint satisfy, viable
+    cdef cell_t i, cell, max_cell = 0
+
+    cap = <size_t>max(support_size, 0)
+    if exact_size > 0:
+        cap = min(cap, <size_t>exact_size)
+    for item in forbidden or []:
+        forbidden_set.insert(<cell_t>item)
+    for item in sorted(set(required or [])):
+        required_vec.push_back(<cell_t>item)
+
+    # Sort like the breadth-first search first, then drop the forbidden cells
+    constraints.reserve(len(py_constraints))
+    for py_constr in py_constraints:
+        constr_set.clear()
+        for item in py_constr:
+            constr_set.insert(<cell_t>item)
+            if item > max_cell:
+                max_cell = <cell_t>item
+        constr_vec.assign(constr_set.begin(), constr_set.end())
+        constraints.push_back(constr_vec)
+    stable_sort(constraints.begin(), constraints.end(), compare_sizes)
+    num_constraints = constraints.size()
+    for level in range(num_constraints):
+        constr_vec.clear()
+        for cell in constraints[level]:
+            if not forbidden_set.count(cell):
+                constr_vec.push_back(cell)
+        constraints[level] = constr_vec
+
+    # last_level[r] is the last constraint at which the required cell r can be added
+    last_level.assign(required_vec.size(), num_constraints)
+    for k in range(required_vec.size()):
+        for level in range(num_constraints):
+            if contains(constraints[level], required_vec[k]):
+                last_level[k] = level
+
+    level = 0
+    while limit < 0 or results.size() < <size_t>limit:
+        # Cut the branch if a missing required cell can no longer be added
+        viable = True
+        missing = 0
+        for k in range(required_vec.size()):
+            if not contains(conf, required_vec[k]):
+                missing += 1
+                if last_level[k] == num_constraints or last_level[k] < level:
+                    viable = False
+        if conf.size() + missing > cap:
+            viable = False
+
+        if viable:
+            # Descend while the configuration satisfies the constraints
+            while level < num_constraints:
+                satisfy = False
+                for i in conf:
+                    if contains(constraints[level], i):
+                        satisfy = True
+                        break
+                if not satisfy:
+                    break
+                level += 1
+
+            if level == num_constraints:
+                sorted_conf = conf
+                sort(sorted_conf.begin(), sorted_conf.end())
+                if matches_query(
+                    sorted_conf, required_vec, forbidden_set, <size_t>exact_size
+                ):
+                    reflected_vec = reflect_support_cpp(sorted_conf)
+                    sort(reflected_vec.begin(), reflected_vec.end())
+                    if reflected_vec < sorted_conf and matches_query(
+                        reflected_vec, required_vec, forbidden_set, <size_t>exact_size
+                    ):
+                        sorted_conf.swap(reflected_vec)
+                    key = string(
+                        <char*>sorted_conf.data(), sorted_conf.size() * sizeof(cell_t)
+                    )
+                    if seen.insert(key).second:
+                        results.push_back(sorted_conf)
+            elif conf.size() < cap and constraints[level].size():
+                conf.push_back(constraints[level][0])
+                levels.push_back(level)
+                branches.push_back(0)
+                level += 1
+                continue
+
+        # Backtrack to the last cell with a remaining sibling
+        while not levels.empty():
+            conf.pop_back()
+            level = levels.back()
+            branch = branches.back() + 1
+            if branch < constraints[level].size():
+                conf.push_back(constraints[level][branch])
+                branches[branches.size() - 1] = branch
+                level += 1
+                break
+            levels.pop_back()
+            branches.pop_back()
+        else:
+            break
+
+    if not as_array:
+        return [tuple(row) for row in results]
+
+    sort(results.begin(), results.end())
+    return rows_to_array(results, cap, max_cell)
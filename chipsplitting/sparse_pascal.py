@@ -0,0 +1,158 @@
+"""
+Module for the system of all Pascal forms of a degree stored as sparse matrices.
+The dense support arrays of the single Pascal forms are never built, which makes
+large degrees feasible. Requires scipy.
+"""
+
+import numpy as np
+import scipy.sparse
+
+from . import tracing
+from .hyperfield_linear_form import HyperfieldLinearForm
+from .hyperfield_linear_system import (
+    HyperfieldHomogeneousLinearSystem,
+    constraints_from_supports,
+)
+from .supports import BASE_TYPES
+from .utils import binomial_table, coordinate_tables, gauss
+
+
+def _block(col_start: np.ndarray, row_start: np.ndarray, row_stop: np.ndarray):
+    """
+    Returns the cells (col_start[i], r) with row_start[i] <= r < row_stop[i]
+    as a tuple of column and row indexes.
+    """
+    lengths = np.maximum(row_stop - row_start, 0)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    offsets = np.arange(lengths.sum()) - starts
+    return np.repeat(col_start, lengths), np.repeat(row_start, lengths) + offsets
+
+
+@tracing.traced()
+def pascal_matrix(degree: int, format: str = "csr"):
+    """
+    Returns the integer matrix of all Pascal forms of the given degree.
+
+    Row b * (degree + 1) + k contains the coefficients of PascalForm(degree, mode, k)
+    with mode = BASE_TYPES[b], the columns are the array indexes of the triangle.
+
+    :param degree: The degree of the Pascal forms.
+    :param format: The scipy.sparse format of the matrix, e.g. 'csr' or 'csc'.
+    """
+    binomials = binomial_table(degree + 1)
+    grid = coordinate_tables(degree)[2]
+    row_indexes, col_indexes, values = [], [], []
+
+    for unit in range(degree + 1):
+        cols = np.arange(unit + 1)
+        signs = np.where((unit + cols) % 2 == 0, 1, -1)
+
+        # diagonal: ncr(degree - c - r, unit - c) for c <= unit and r <= degree - unit
+        c, r = _block(cols, np.zeros_like(cols), np.full_like(cols, degree - unit + 1))
+        row_indexes.append(np.full(c.size, unit))
+        col_indexes.append(grid[c, r])
+        values.append(binomials[degree - c - r, unit - c])
+
+        # row: (-1)^(unit + c) ncr(r, unit - c) for c <= unit and r >= unit - c
+        c, r = _block(cols, unit - cols, degree - cols + 1)
+        row_indexes.append(np.full(c.size, degree + 1 + unit))
+        col_indexes.append(grid[c, r])
+        values.append(np.repeat(signs, degree - unit + 1) * binomials[r, unit - c])
+
+        # column: the reflection of the row form
+        row_indexes.append(np.full(c.size, 2 * (degree + 1) + unit))
+        col_indexes.append(grid[r, c])
+        values.append(values[-1])
+
+    matrix = scipy.sparse.coo_array(
+        (
+            np.concatenate(values),
+            (np.concatenate(row_indexes), np.concatenate(col_indexes)),
+        ),
+        shape=(len(BASE_TYPES) * (degree + 1), gauss(degree + 1)),
+    )
+    return matrix.asformat(format)
+
+
+def sign_pattern(matrix, sign: int):
+    """
+    Returns a boolean CSR matrix of the entries of the given sign.
+    """
+    matrix = scipy.sparse.csr_array(matrix)
+    pattern = scipy.sparse.csr_array(
+        (np.sign(matrix.data) == sign, matrix.indices.copy(), matrix.indptr.copy()),
+        shape=matrix.shape,
+    )
+    pattern.eliminate_zeros()
+    return pattern
+
+
+class SparsePascalSystem(HyperfieldHomogeneousLinearSystem):
+    """
+    The hyperfield system of all Pascal forms of a degree, stored as sparse matrices.
+    """
+
+    @tracing.traced("SparsePascalSystem")
+    def __init__(self, degree: int):
+        """
+        :param degree: The degree of the Pascal forms.
+        """
+        self.degree = degree
+        self.matrix = pascal_matrix(degree)
+        self.support_pos, self.support_neg = self.to_hyperfield()
+
+        conditions = []
+        for i, (pos, neg) in enumerate(self.supports()):
+            if 0 in pos:
+                conditions.append(self.support_pos[[i], :])
+            elif 0 in neg:
+                conditions.append(self.support_neg[[i], :])
+            elif pos.size and neg.size:
+                conditions.append(self.support_pos[[i], :])
+                conditions.append(self.support_neg[[i], :])
+        self.conditions = scipy.sparse.vstack(conditions, format="csr")
+
+    @property
+    def linear_forms(self) -> list[HyperfieldLinearForm]:
+        """
+        The Pascal forms as dense hyperfield linear forms, built on every access.
+        """
+        return [
+            HyperfieldLinearForm.from_array(
+                self.support_pos[[i], :].toarray().ravel(),
+                self.support_neg[[i], :].toarray().ravel(),
+            )
+            for i in range(self.matrix.shape[0])
+        ]
+
+    def to_hyperfield(self):
+        """
+        Converts the Pascal forms to hyperfield linear forms.
+
+        :return: A tuple of boolean CSR matrices containing the positive and the
+            negative support of every Pascal form as a row.
+        """
+        return sign_pattern(self.matrix, 1), sign_pattern(self.matrix, -1)
+
+    def supports(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the positive and the negative support of every Pascal form
+        as sorted arrays of array indexes.
+        """
+        return [
+            (row_indices(self.support_pos, i), row_indices(self.support_neg, i))
+            for i in range(self.matrix.shape[0])
+        ]
+
+    @tracing.traced(items=len)
+    def make_constraints(self) -> list[list[int]]:
+        return constraints_from_supports(
+            [(set(pos.tolist()), set(neg.tolist())) for pos, neg in self.supports()]
+        )
+
+
+def row_indices(matrix, row: int) -> np.ndarray:
+    """
+    Returns the sorted column indexes of the stored entries of a row of a CSR matrix.
+    """
+    return np.sort(matrix.indices[matrix.indptr[row] : matrix.indptr[row + 1]])
@@ -0,0 +1,127 @@
+"""
+Module for searching candidate supports of fundamental models with the Pascal forms.
+"""
+
+import numpy as np
+
+from . import tracing
+from .hyperfield_linear_system import HyperfieldHomogeneousLinearSystem
+from .pascal_form import PascalForm
+from .utils import gauss, reflect_supports
+
+BASE_TYPES = ("diag", "row", "col")
+
+
+def pascal_system(
+    degree: int, sparse: bool = False
+) -> HyperfieldHomogeneousLinearSystem:
+    """
+    Returns the hyperfield system of all Pascal forms of the given degree.
+
+    :param degree: The degree of the Pascal forms.
+    :param sparse: If True, the system is stored as sparse matrices, see
+        SparsePascalSystem. Requires scipy.
+    """
+    if sparse:
+        from .sparse_pascal import SparsePascalSystem
+
+        return SparsePascalSystem(degree)
+
+    return HyperfieldHomogeneousLinearSystem(
+        [
+            PascalForm(degree, base_type, unit).to_hyperfield()
+            for base_type in BASE_TYPES
+            for unit in range(degree + 1)
+        ]
+    )
+
+
+@tracing.traced(items=len)
+def find_positive_supports(
+    pos_support_size: int,
+    degree: int,
+    as_array: bool = False,
+    backend: str | None = None,
+):
+    """
+    Computes the candidate positive supports of the given maximal size and degree.
+
+    :param pos_support_size: The maximal size of a positive support, i.e. n + 1.
+    :param degree: The degree d.
+    :param as_array: If True, the supports are returned as a 2D NumPy array.
+    :param backend: The name of the solver backend.
+    """
+    return pascal_system(degree).quick_solve_loop_fast(
+        pos_support_size, as_array, backend
+    )
+
+
+def find_positive_supports_range(
+    degree: int, pos_support_sizes, as_array: bool = False, backend: str | None = None
+) -> dict:
+    """
+    Computes the candidate positive supports of the given degree for several maximal
+    sizes at once. The Pascal forms, the constraints and the search are computed once
+    for the largest size, see HyperfieldHomogeneousLinearSystem.quick_solve_range.
+
+    :param degree: The degree d.
+    :param pos_support_sizes: An iterable of maximal positive support sizes, e.g. range(5, 9).
+    :param as_array: If True, the supports are returned as 2D NumPy arrays.
+    :param backend: The name of the solver backend.
+    :return: A dictionary mapping every support size to its supports.
+    """
+    return pascal_system(degree).quick_solve_range(pos_support_sizes, as_array, backend)
+
+
+@tracing.traced(items=len)
+def find_minimal_supports(supports, degree: int):
+    """
+    Returns the supports that contain no other support, where the reflection of
+    every support counts as a support as well.
+
+    Every proper subset of a support is looked up among the smaller supports, which
+    takes 2^width lookups per support instead of a comparison with every other one.
+
+    :param supports: A 2D array with one sorted, zero padded support per row,
+        e.g. the result of find_positive_supports with as_array=True.
+    :param degree: The degree d.
+    :return: The minimal rows of supports, in their original order.
+    """
+    supports = np.asarray(supports)
+    if len(supports) == 0:
+        return supports
+
+    rows = supports.astype(np.int64)
+    width = rows.shape[1]
+    sizes = np.count_nonzero(rows, axis=1)
+    others = np.concatenate((rows, reflect_supports(rows, degree)))
+    known = np.unique(support_keys(others, degree))
+
+    minimal = np.ones(len(rows), dtype=bool)
+    for mask in range(1, (1 << width) - 1):
+        columns = [k for k in range(width) if mask >> k & 1]
+        # The padding is at the end of a row, so the selected cells stay sorted
+        subsets = np.zeros_like(rows)
+        subsets[:, : len(columns)] = rows[:, columns]
+        proper = minimal & (np.count_nonzero(subsets, axis=1) < sizes)
+        if not np.any(proper):
+            continue
+        keys = support_keys(subsets[proper], degree)
+        index = np.minimum(np.searchsorted(known, keys), len(known) - 1)
+        minimal[np.flatnonzero(proper)[known[index] == keys]] = False
+    return supports[minimal]
+
+
+def support_keys(supports: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Maps every sorted, zero padded support to a sortable key, so that two supports
+    of the same width have equal keys if and only if they are equal.
+    """
+    base = gauss(degree + 1)
+    width = supports.shape[1]
+    if base**width < 1 << 63:
+        powers = base ** np.arange(width - 1, -1, -1, dtype=np.int64)
+        return supports.astype(np.int64) @ powers
+    # Big-endian bytes compare like the sorted supports
+    rows = np.ascontiguousarray(supports.astype(">u2"))
+    return rows.view(np.dtype((np.void, 2 * width))).ravel()
@@ -0,0 +1,220 @@
+"""
+Module for tracing the stages of a run.
+
+Tracing is off by default, in which case a span costs one flag check. If it is
+enabled, every span records its start, duration, thread and item count. Spans of one
+thread nest by time. The spans can be exported in the Chrome trace event format,
+which chrome://tracing and https://ui.perfetto.dev display as a flame graph.
+
+Setting the environment variable CHIPSPLITTING_TRACE to a file path enables tracing
+on import and exports the spans to that file when the interpreter exits.
+
+Only the calling process is traced, spans of worker processes are not collected.
+"""
+
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+_enabled = False
+_events: list[dict] = []
+_lock = threading.Lock()
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+class Span:
+    """
+    A running span. Code inside the span can attach an item count and arguments.
+    """
+
+    __slots__ = ("name", "args", "items", "start")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+        self.items: Optional[int] = None
+        self.start = time.perf_counter()
+
+    def count(self, items: int):
+        """
+        Sets the number of items the span processed, e.g. the number of supports.
+        """
+        self.items = int(items)
+
+    def set(self, **args):
+        """
+        Attaches further arguments to the span.
+        """
+        self.args.update(args)
+
+
+class _NoSpan:
+    """
+    The span returned if tracing is disabled. It ignores everything.
+    """
+
+    __slots__ = ()
+
+    def count(self, items: int):
+        pass
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enable():
+    """
+    Enables tracing.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    Disables tracing. Recorded spans are kept.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def clear():
+    """
+    Removes all recorded spans.
+    """
+    with _lock:
+        _events.clear()
+
+
+def events() -> list[dict]:
+    """
+    Returns a copy of the recorded spans as Chrome trace events.
+    """
+    with _lock:
+        return list(_events)
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def current_span():
+    """
+    Returns the innermost running span of the calling thread.
+    """
+    stack = _stack() if _enabled else None
+    return stack[-1] if stack else _NO_SPAN
+
+
+@contextmanager
+def _record(name: str, args: dict):
+    span = Span(name, args)
+    stack = _stack()
+    stack.append(span)
+    try:
+        yield span
+    finally:
+        stack.pop()
+        end = time.perf_counter()
+        args = dict(span.args)
+        if span.items is not None:
+            args["items"] = span.items
+        if stack:
+            args["parent"] = stack[-1].name
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (span.start - _origin) * 1e6,
+            "dur": (end - span.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with _lock:
+            _events.append(event)
+
+
+def span(name: str, **args):
+    """
+    Returns a context manager recording a span with the given name and arguments.
+    The context manager yields the span, so the item count can be set inside of it:
+
+        with tracing.span("solver", support_size=6) as s:
+            supports = solve()
+            s.count(len(supports))
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _record(name, args)
+
+
+def traced(name: Optional[str] = None, items: Optional[Callable] = None):
+    """
+    Decorator recording a span for every call of the function.
+
+    :param name: The name of the span. Defaults to the qualified name of the function.
+    :param items: An optional callable computing the item count from the return value.
+    """
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _record(span_name, {}) as s:
+                result = function(*args, **kwargs)
+                if items is not None:
+                    s.count(items(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def export(path) -> int:
+    """
+    Writes the recorded spans to a Chrome trace JSON file.
+
+    :return: The number of exported spans.
+    """
+    trace = events()
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    return len(trace)
+
+
+def _export_at_exit(path):
+    # Worker processes import this module as well, only the main process exports
+    if multiprocessing.parent_process() is None:
+        export(path)
+
+
+if os.environ.get("CHIPSPLITTING_TRACE"):
+    enable()
+    atexit.register(_export_at_exit, os.environ["CHIPSPLITTING_TRACE"])
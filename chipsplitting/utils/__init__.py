@@ -1,3 +1,14 @@
-from .binomial import ncr
-from .coordinate_transformation import gauss, get_array_index, to_coordinate
-from .gauss import gauss
+from .binomial import ncr, binomial_table
+from .coordinate_transformation import (
+    gauss,
+    get_array_index,
+    to_coordinate,
+    coordinate_tables,
+    get_array_indices,
+    to_coordinates,
+    reflect_indices,
+    support_dtype,
+    sort_supports,
+    reflect_supports,
+    canonicalize_supports,
+)
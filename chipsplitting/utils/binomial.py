@@ -1,6 +1,19 @@
 import math
 
+import numpy as np
+
 
 def ncr(n: int, r: int) -> int:
     f = math.factorial
     return f(n) // f(r) // f(n - r)
+
+
+def binomial_table(size: int) -> np.ndarray:
+    """
+    Returns the table of binomial coefficients ncr(n, k) for 0 <= k <= n < size.
+    """
+    table = np.zeros((size, size), dtype=np.int64)
+    table[:, 0] = 1
+    for n in range(1, size):
+        table[n, 1:] = table[n - 1, 1:] + table[n - 1, :-1]
+    return table
@@ -1,5 +1,8 @@
+import functools
 import math
 
+import numpy as np
+
 from .gauss import gauss
 
 
@@ -14,7 +17,8 @@ def to_coordinate(n):
     """
     Convert the index of the array representation to the row and column index
     """
-    degree = int(-1.5 + math.sqrt(0.25 + 2 * n)) + 1
+    n = int(n)
+    degree = (math.isqrt(8 * n + 1) - 1) // 2
     s = gauss(degree)
     return (n - s, degree - n + s)
 
@@ -32,3 +36,102 @@ def grid_iter(degree, support_size):
         diag = get_array_index(d, degree - d)
         for rest in gen(support_size - 1, diag):
             yield (diag,) + rest
+
+
+@functools.lru_cache(maxsize=None)
+def coordinate_tables(
+    degree: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lookup tables for the triangle of the given degree. The tables are cached and read-only.
+
+    :param degree: The degree of the triangle.
+    :return: A tuple containing the column and the row of every array index,
+        the array index of every (column, row) pair, which is -1 outside of the triangle,
+        and the array index of the reflection of every array index.
+    """
+    size = gauss(degree + 1)
+    diagonals = np.repeat(np.arange(degree + 1), np.arange(1, degree + 2))
+    cols = np.arange(size) - gauss(diagonals)
+    rows = diagonals - cols
+
+    grid = np.full((degree + 1, degree + 1), -1)
+    grid[cols, rows] = np.arange(size)
+    reflection = grid[rows, cols]
+
+    for table in (cols, rows, grid, reflection):
+        table.setflags(write=False)
+    return cols, rows, grid, reflection
+
+
+def get_array_indices(cols: np.ndarray, rows: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Vectorized version of get_array_index for a triangle of the given degree.
+    Pairs outside of the triangle are mapped to -1.
+    """
+    return coordinate_tables(degree)[2][cols, rows]
+
+
+def to_coordinates(indexes: np.ndarray, degree: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized version of to_coordinate for a triangle of the given degree.
+
+    :return: A tuple containing the column and the row indexes.
+    """
+    cols, rows, _, _ = coordinate_tables(degree)
+    return cols[indexes], rows[indexes]
+
+
+def reflect_indices(indexes: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Maps every array index to the array index of its reflection (col, row) -> (row, col).
+    """
+    return coordinate_tables(degree)[3][indexes]
+
+
+def support_dtype(degree: int) -> np.dtype:
+    """
+    Returns the dtype of support arrays of the given degree:
+    uint8 if every array index of the triangle fits, uint16 otherwise.
+    """
+    return np.dtype(np.uint8 if gauss(degree + 1) <= 256 else np.uint16)
+
+
+def sort_supports(supports: np.ndarray) -> np.ndarray:
+    """
+    Sorts every support along the last axis.
+    Supports are zero padded, and the padding is moved to the end.
+    """
+    supports = np.sort(supports, axis=-1)
+    width = supports.shape[-1]
+    if width == 0:
+        return supports
+    num_zeros = np.count_nonzero(supports == 0, axis=-1)[..., np.newaxis]
+    return np.take_along_axis(
+        supports, (np.arange(width) + num_zeros) % width, axis=-1
+    )
+
+
+def reflect_supports(supports: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Reflects zero padded supports, given along the last axis, and sorts the result.
+    """
+    supports = np.asarray(supports)
+    return sort_supports(reflect_indices(supports, degree).astype(supports.dtype))
+
+
+def canonicalize_supports(supports: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Maps every zero padded support, given along the last axis, to the lexicographically
+    smaller one of the sorted support and its sorted reflection.
+    Two supports are equal up to reflection if and only if their canonical forms are equal.
+    """
+    supports = sort_supports(np.asarray(supports))
+    reflected = reflect_supports(supports, degree)
+
+    differs = supports != reflected
+    first = np.argmax(differs, axis=-1)[..., np.newaxis]
+    keep = np.take_along_axis(supports, first, axis=-1) <= np.take_along_axis(
+        reflected, first, axis=-1
+    )
+    return np.where(keep, supports, reflected)
@@ -1,2 +1,2 @@
 def gauss(n: int) -> int:
-    return int(n * (n+1) * 0.5)
+    return n * (n + 1) // 2
@@ -0,0 +1,529 @@
+"""
+Module for families of supports stored as zero-suppressed decision diagrams (ZDDs).
+
+A ZDD node (v, lo, hi) stands for the family lo ∪ {S ∪ {v} : S ∈ hi}, where every
+variable in lo and hi is larger than v. The terminal 0 is the empty family and the
+terminal 1 is the family containing only the empty set. Nodes are shared through a
+unique table, so families with common structure take little memory, and all
+operations work on the nodes without enumerating the members.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from . import tracing
+from .utils import coordinate_tables, gauss
+
+EMPTY = 0
+BASE = 1
+
+
+class ZDDManager:
+    """
+    Unique table and operation caches shared by the families built with it.
+    """
+
+    def __init__(self):
+        # The terminals have no variable, they sort after every variable
+        self._var: list[float] = [float("inf"), float("inf")]
+        self._lo: list[int] = [EMPTY, BASE]
+        self._hi: list[int] = [EMPTY, BASE]
+        self._unique: dict[tuple[int, int, int], int] = {}
+        self._cache: dict[tuple, int] = {}
+        self._count_cache: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._var)
+
+    def node(self, var: int, lo: int, hi: int) -> int:
+        """
+        Returns the node (var, lo, hi), applying the zero-suppression rule.
+        """
+        if hi == EMPTY:
+            return lo
+        key = (var, lo, hi)
+        node = self._unique.get(key)
+        if node is None:
+            node = len(self._var)
+            self._var.append(var)
+            self._lo.append(lo)
+            self._hi.append(hi)
+            self._unique[key] = node
+        return node
+
+    def clear_cache(self):
+        """
+        Clears the operation caches. The nodes are kept.
+        """
+        self._cache.clear()
+        self._count_cache.clear()
+
+    def union(self, f: int, g: int) -> int:
+        if f == EMPTY or f == g:
+            return g
+        if g == EMPTY:
+            return f
+        if f > g:
+            f, g = g, f
+        key = ("|", f, g)
+        if key in self._cache:
+            return self._cache[key]
+        var, vf, vg = self._top(f, g)
+        result = self.node(
+            var,
+            self.union(self._cofactor(f, vf, var, 0), self._cofactor(g, vg, var, 0)),
+            self.union(self._cofactor(f, vf, var, 1), self._cofactor(g, vg, var, 1)),
+        )
+        self._cache[key] = result
+        return result
+
+    def intersection(self, f: int, g: int) -> int:
+        if f == EMPTY or g == EMPTY:
+            return EMPTY
+        if f == g:
+            return f
+        if f > g:
+            f, g = g, f
+        key = ("&", f, g)
+        if key in self._cache:
+            return self._cache[key]
+        var, vf, vg = self._top(f, g)
+        if vf != vg:
+            # Only one side has sets containing var
+            lo_f, lo_g = self._cofactor(f, vf, var, 0), self._cofactor(g, vg, var, 0)
+            result = self.intersection(lo_f, lo_g)
+        else:
+            result = self.node(
+                var,
+                self.intersection(self._lo[f], self._lo[g]),
+                self.intersection(self._hi[f], self._hi[g]),
+            )
+        self._cache[key] = result
+        return result
+
+    def difference(self, f: int, g: int) -> int:
+        if f == EMPTY or f == g:
+            return EMPTY
+        if g == EMPTY:
+            return f
+        key = ("-", f, g)
+        if key in self._cache:
+            return self._cache[key]
+        var, vf, vg = self._top(f, g)
+        lo_f, lo_g = self._cofactor(f, vf, var, 0), self._cofactor(g, vg, var, 0)
+        hi_f, hi_g = self._cofactor(f, vf, var, 1), self._cofactor(g, vg, var, 1)
+        result = self.node(
+            var, self.difference(lo_f, lo_g), self.difference(hi_f, hi_g)
+        )
+        self._cache[key] = result
+        return result
+
+    def change(self, f: int, var: int) -> int:
+        """
+        Toggles var in every set of the family.
+        """
+        if f == EMPTY:
+            return EMPTY
+        key = ("^", f, var)
+        if key in self._cache:
+            return self._cache[key]
+        top = self._var[f]
+        if top > var:
+            result = self.node(var, EMPTY, f)
+        elif top == var:
+            result = self.node(var, self._hi[f], self._lo[f])
+        else:
+            result = self.node(
+                top, self.change(self._lo[f], var), self.change(self._hi[f], var)
+            )
+        self._cache[key] = result
+        return result
+
+    def avoiding(self, f: int, cells: frozenset) -> int:
+        """
+        Returns the sets of the family that contain none of the cells.
+        """
+        if f <= BASE:
+            return f
+        key = ("avoid", f, cells)
+        if key in self._cache:
+            return self._cache[key]
+        if self._var[f] in cells:
+            result = self.avoiding(self._lo[f], cells)
+        else:
+            result = self.node(
+                self._var[f],
+                self.avoiding(self._lo[f], cells),
+                self.avoiding(self._hi[f], cells),
+            )
+        self._cache[key] = result
+        return result
+
+    def contains_empty(self, f: int) -> bool:
+        while f > BASE:
+            f = self._lo[f]
+        return f == BASE
+
+    def minimal(self, f: int) -> int:
+        """
+        Returns the sets of the family that contain no other set of the family.
+        """
+        if f <= BASE:
+            return f
+        key = ("min", f)
+        if key in self._cache:
+            return self._cache[key]
+        lo = self.minimal(self._lo[f])
+        result = self.node(self._var[f], lo, self.nonsup(self.minimal(self._hi[f]), lo))
+        self._cache[key] = result
+        return result
+
+    def nonsup(self, f: int, g: int) -> int:
+        """
+        Returns the sets of f that contain no set of g.
+        """
+        if g == EMPTY or f == EMPTY:
+            return f
+        if f == g or self.contains_empty(g):
+            return EMPTY
+        if f == BASE:
+            return BASE
+        key = ("nonsup", f, g)
+        if key in self._cache:
+            return self._cache[key]
+        vf, vg = self._var[f], self._var[g]
+        if vg < vf:
+            # No set of f contains vg
+            result = self.nonsup(f, self._lo[g])
+        elif vf < vg:
+            result = self.node(
+                vf, self.nonsup(self._lo[f], g), self.nonsup(self._hi[f], g)
+            )
+        else:
+            result = self.node(
+                vf,
+                self.nonsup(self._lo[f], self._lo[g]),
+                self.nonsup(self.nonsup(self._hi[f], self._hi[g]), self._lo[g]),
+            )
+        self._cache[key] = result
+        return result
+
+    def permute(self, f: int, mapping, memo: Optional[dict] = None) -> int:
+        """
+        Renames the variables of the family with an injective mapping.
+        """
+        if f <= BASE:
+            return f
+        memo = {} if memo is None else memo
+        if f not in memo:
+            memo[f] = self.union(
+                self.permute(self._lo[f], mapping, memo),
+                self.change(
+                    self.permute(self._hi[f], mapping, memo), int(mapping[self._var[f]])
+                ),
+            )
+        return memo[f]
+
+    def count(self, f: int) -> int:
+        if f <= BASE:
+            return f
+        if f not in self._count_cache:
+            self._count_cache[f] = self.count(self._lo[f]) + self.count(self._hi[f])
+        return self._count_cache[f]
+
+    def combinations(self, variables: list[int], max_size: int) -> int:
+        """
+        Returns the family of all sets of at most max_size of the variables.
+        """
+        variables = sorted(variables)
+        # layer[k] is the family of the remaining variables with at most k elements
+        layer = [BASE] * (max_size + 1)
+        for var in reversed(variables):
+            layer = [
+                self.node(var, layer[k], layer[k - 1] if k else EMPTY)
+                for k in range(max_size + 1)
+            ]
+        return layer[max_size] if max_size >= 0 else EMPTY
+
+    def canonical(self, f: int, involution, num_vars: int) -> int:
+        """
+        Returns the sets S of the family with S <= involution(S), comparing the sorted
+        sets lexicographically. For sets of equal size this holds if and only if the
+        smallest variable in the symmetric difference of S and involution(S) is in S.
+
+        The variables are visited in increasing order. A variable v < involution(v)
+        stays pending until involution(v) is visited. The smallest differing pair
+        decides, so pairs starting after it are no longer tracked.
+
+        :param involution: An array mapping every variable to its image.
+        :param num_vars: The variables are 0, ..., num_vars - 1.
+        """
+        return self._canonical(f, 0, (), None, involution, num_vars, {})
+
+    def _canonical(self, f, pos, pending, decided, involution, num_vars, memo):
+        if f == EMPTY:
+            return EMPTY
+        if decided is not None and not pending:
+            return f if decided[1] else EMPTY
+        if pos == num_vars:
+            assert f == BASE
+            return BASE if decided is None or decided[1] else EMPTY
+
+        key = (f, pos, pending, decided)
+        if key in memo:
+            return memo[key]
+
+        def visit(bit):
+            image = int(involution[pos])
+            if image > pos:
+                if decided is None or pos < decided[0]:
+                    return pending + ((pos, bit),), decided
+            elif image < pos:
+                for i, (var, image_bit) in enumerate(pending):
+                    if var == image:
+                        rest = pending[:i] + pending[i + 1 :]
+                        if image_bit != bit and (decided is None or image < decided[0]):
+                            # image is in the symmetric difference, S wins if it has it
+                            rest = tuple(p for p in rest if p[0] < image)
+                            return rest, (image, bool(image_bit))
+                        return rest, decided
+            return pending, decided
+
+        args = (involution, num_vars, memo)
+        if self._var[f] == pos:
+            result = self.node(
+                pos,
+                self._canonical(self._lo[f], pos + 1, *visit(0), *args),
+                self._canonical(self._hi[f], pos + 1, *visit(1), *args),
+            )
+        else:
+            result = self._canonical(f, pos + 1, *visit(0), *args)
+        memo[key] = result
+        return result
+
+    def iterate(self, f: int) -> Iterator[tuple[int, ...]]:
+        """
+        Yields the sets of the family as sorted tuples. The sets are generated one by
+        one in depth-first order of the diagram.
+        """
+        stack = [(f, ())]
+        while stack:
+            node, prefix = stack.pop()
+            if node == EMPTY:
+                continue
+            if node == BASE:
+                yield prefix
+                continue
+            # The sets without the variable are visited first
+            stack.append((self._hi[node], prefix + (self._var[node],)))
+            stack.append((self._lo[node], prefix))
+
+    def _top(self, f: int, g: int) -> tuple[int, float, float]:
+        vf, vg = self._var[f], self._var[g]
+        return min(vf, vg), vf, vg
+
+    def _cofactor(self, f: int, top: float, var: int, branch: int) -> int:
+        if top != var:
+            return f if branch == 0 else EMPTY
+        return self._hi[f] if branch else self._lo[f]
+
+
+class ZDD:
+    """
+    A family of sets of non-negative integers, e.g. the array indexes of cells,
+    stored as a zero-suppressed decision diagram.
+
+    Families can only be combined if they share a manager. Without an explicit
+    manager, every family is built in a new one, so its nodes and caches are freed
+    together with the family.
+    """
+
+    __slots__ = ("manager", "root")
+
+    def __init__(self, root: int = EMPTY, manager: Optional[ZDDManager] = None):
+        """
+        :param root: The root node in the manager.
+        :param manager: The manager storing the nodes. Defaults to a new manager.
+        """
+        self.manager = manager or ZDDManager()
+        self.root = root
+
+    @classmethod
+    def from_sets(
+        cls, sets: Iterable[Iterable[int]], manager: Optional[ZDDManager] = None
+    ) -> "ZDD":
+        """
+        Builds the family of the given sets.
+        """
+        manager = manager or ZDDManager()
+        root = EMPTY
+        for s in sets:
+            node = BASE
+            for var in sorted(set(int(x) for x in s), reverse=True):
+                node = manager.node(var, EMPTY, node)
+            root = manager.union(root, node)
+        return cls(root, manager)
+
+    @classmethod
+    def combinations(
+        cls, variables, max_size: int, manager: Optional[ZDDManager] = None
+    ) -> "ZDD":
+        """
+        Builds the family of all sets of at most max_size of the variables.
+        """
+        manager = manager or ZDDManager()
+        return cls(manager.combinations([int(v) for v in variables], max_size), manager)
+
+    @classmethod
+    @tracing.traced("ZDD.hitting_sets")
+    def hitting_sets(
+        cls,
+        constraints: list[list[int]],
+        max_size: int,
+        manager: Optional[ZDDManager] = None,
+    ) -> "ZDD":
+        """
+        Builds the family of all sets of at most max_size cells that intersect every
+        constraint, e.g. for the constraints of HyperfieldHomogeneousLinearSystem.
+        """
+        manager = manager or ZDDManager()
+        variables = sorted({int(c) for constraint in constraints for c in constraint})
+        family = cls.combinations(variables, max_size, manager)
+        # Constraints with few cells remove the most sets, so they come first
+        for constraint in sorted(constraints, key=len):
+            family = family.hitting(constraint)
+        return family
+
+    def _wrap(self, root: int) -> "ZDD":
+        return ZDD(root, self.manager)
+
+    def _root_of(self, other: "ZDD") -> int:
+        assert other.manager is self.manager, "Families must share a manager."
+        return other.root
+
+    def __or__(self, other: "ZDD") -> "ZDD":
+        return self._wrap(self.manager.union(self.root, self._root_of(other)))
+
+    def __and__(self, other: "ZDD") -> "ZDD":
+        return self._wrap(self.manager.intersection(self.root, self._root_of(other)))
+
+    def __sub__(self, other: "ZDD") -> "ZDD":
+        return self._wrap(self.manager.difference(self.root, self._root_of(other)))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ZDD):
+            return NotImplemented
+        return self.manager is other.manager and self.root == other.root
+
+    def __hash__(self) -> int:
+        return hash((id(self.manager), self.root))
+
+    def __bool__(self) -> bool:
+        return self.root != EMPTY
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[tuple[int, ...]]:
+        return self.manager.iterate(self.root)
+
+    def __contains__(self, s) -> bool:
+        node = self.root
+        for var in sorted(set(int(x) for x in s)):
+            while node > BASE and self.manager._var[node] < var:
+                node = self.manager._lo[node]
+            if node <= BASE or self.manager._var[node] != var:
+                return False
+            node = self.manager._hi[node]
+        return self.manager.contains_empty(node)
+
+    def __repr__(self) -> str:
+        return f"ZDD(sets: {self.count()}, nodes: {self.node_count()})"
+
+    def count(self) -> int:
+        """
+        Returns the number of sets in the family.
+        """
+        return self.manager.count(self.root)
+
+    def node_count(self) -> int:
+        """
+        Returns the number of inner nodes reachable from the root.
+        """
+        seen = set()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node <= BASE or node in seen:
+                continue
+            seen.add(node)
+            stack.append(self.manager._lo[node])
+            stack.append(self.manager._hi[node])
+        return len(seen)
+
+    def minimal(self) -> "ZDD":
+        """
+        Returns the sets of the family that contain no other set of the family.
+        """
+        return self._wrap(self.manager.minimal(self.root))
+
+    def hitting(self, constraint: Iterable[int]) -> "ZDD":
+        """
+        Returns the sets of the family that intersect the constraint.
+        """
+        cells = frozenset(int(c) for c in constraint)
+        return self._wrap(
+            self.manager.difference(self.root, self.manager.avoiding(self.root, cells))
+        )
+
+    def avoiding(self, cells: Iterable[int]) -> "ZDD":
+        """
+        Returns the sets of the family that contain none of the cells.
+        """
+        cells = frozenset(int(c) for c in cells)
+        return self._wrap(self.manager.avoiding(self.root, cells))
+
+    def permute(self, mapping) -> "ZDD":
+        """
+        Applies an injective renaming of the variables, given as an array or a list
+        indexed by the variables, to every set.
+        """
+        return self._wrap(self.manager.permute(self.root, mapping))
+
+    def reflect(self, degree: int) -> "ZDD":
+        """
+        Reflects every support of the triangle of the given degree.
+        """
+        return self.permute(coordinate_tables(degree)[3])
+
+    def canonical(self, degree: int) -> "ZDD":
+        """
+        Returns the supports that are lexicographically at most their reflection.
+        """
+        return self._wrap(
+            self.manager.canonical(
+                self.root, coordinate_tables(degree)[3], gauss(degree + 1)
+            )
+        )
+
+    def reflection_quotient(self, degree: int) -> "ZDD":
+        """
+        Keeps one support of every pair of reflected supports in the family, the
+        lexicographically smaller one if both belong to it.
+        """
+        return self.canonical(degree) | (self - self.reflect(degree))
+
+    def to_array(self, width: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the sets as rows of a zero padded 2D array, see solver_backends.
+
+        :param width: The number of columns. Defaults to the size of the largest set.
+        """
+        sets = list(self)
+        if width is None:
+            width = max((len(s) for s in sets), default=0)
+        rows = np.zeros((len(sets), width), dtype=np.int64)
+        for i, s in enumerate(sets):
+            rows[i, : len(s)] = s
+        return rows